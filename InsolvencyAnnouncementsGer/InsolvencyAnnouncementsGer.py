@@ -1,33 +1,44 @@
 import pandas as pd
 import requests
 import html
+import ast
 import re
-from bs4 import BeautifulSoup
+import os
+import sys
+import gzip
+import json
+import time
+import random
+import inspect
+import threading
+from bs4 import BeautifulSoup, UnicodeDammit
+from bs4.dammit import EncodingDetector
+from contextlib import contextmanager
 from datetime import date
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from urllib.parse import urlparse
+from .InsolvencyAnnouncementsGer_store import _key_pattern, announcement_key, content_hash, store_read, store_write
+from .InsolvencyAnnouncementsGer_events import _emit, _print, _stage
+from .InsolvencyAnnouncementsGer_constants import _states, _states_e, _states_a, _registers, _subjects, _subjects_e, _default_url, _urlencode
 
-_states = ["Baden-Württemberg", "Bayern", "Berlin", "Brandenburg", "Bremen", "Hamburg", "Hessen", "Mecklenburg-Vorpommern", "Niedersachsen",
-           "Nordrhein-Westfalen", "Rheinland-Pfalz", "Saarland", "Sachsen", "Sachsen-Anhalt", "Schleswig-Holstein", "Thüringen"]
+_session = None
+_timeout = 30
 
-_states_e = ["Baden-Wuerttemberg", "Bavaria", "Berlin", "Brandenburg", "Bremen", "Hamburg", "Hesse", "Mecklenburg-Western Pomerania", "Lower Saxony",
-             "North Rhine-Westphalia", "Rhineland-Palatinate", "Saarland", "Saxony", "Saxony-Anhalt", "Schleswig-Holstein", "Thuringia"]
+_session_id = [None, 0.0]
+_session_id_lock = threading.Lock()
+_session_id_max_age = 600
+_session_id_pattern = re.compile(r'PHPSESSID=([^&\'"\s#]+)')
 
-_states_a = ["bw", "by", "be", "bb", "hb", "hh", "he", "mv", "ns", "nw", "rp", "sl", "sn", "st", "sh", "th"]
+_keywords_pattern = re.compile('keywords" CONTENT=[^>"]*"([^>]*)"', re.IGNORECASE)
+_decode_table = dict(zip(['Amtsgericht', 'AG', '\\xe4', '\\xc4',  '\\xdf', '\\xfc', '\\xdc', '\\xf6', '\\xd6', '\\xa7', '\\xe9'],
+                         ['', '', 'ä', 'Ä', 'ß', 'ü', 'Ü', 'ö', 'Ö', '§', 'é']))
+_decode_pattern = re.compile("|".join(re.escape(key) for key in _decode_table))
+_link_text_pattern = re.compile('>(.*)</a>', re.IGNORECASE | re.DOTALL)
+_link_pattern = re.compile(r'^\s*(?:\d{1,2}\.\d{1,2}\.\d{4}|\d{4}-\d{2}-\d{2})?\s*(\d+\s*I[NKE]\s*\d+\s*/\s*\d+)?[\s:,-]*(.*?)(?:,\s*([^,]*?))?\s*$', re.DOTALL)
 
-_registers = ["GnR", "HRA", "HRB", "PR", "VR"] 
-
-_subjects = ["-- Alle Bekanntmachungen innerhalb des Verfahrens --", "Sicherungsmaßnahmen", "Eröffnungen", "Termine", "Entscheidungen im Verfahren",
-             "Entscheidungen nach Aufhebung des Verfahrens","Sonstiges", "Entscheidungen im Restschuldbefreiungsverfahren", 
-             "Verteilungsverzeichnisse (§ 188 InsO) d. Verw./Treuh.", "Überwachte Insolvenzpläne", "Abweisungen mangels Masse"]
-
-_subjects_e = ["All Subjects", "Protective measures", "Openings","Events", "Decisions taken in proceedings", "Decisions taken after proceedings",
-               "Others", "Decisions taken in the residual-debt exemption proceedings", "Distribution records (§ 188 InsO) of custodians/trustees",
-               "Monitored insolvency plans", "Dismissals due to lack of assets"]
-
-_default_url = ['https://alt.insolvenzbekanntmachungen.de/cgi-bin', '/bl_suche.pl?PHPSESSID=971ac0cbc174f6cfc71ed602a6787558&','Suchfunktion=',
-              'uneingeschr', '&Absenden=Suche+starten&Bundesland=', '--+Alle+Bundesl%E4nder+--', '&Gericht=','--+Alle+Insolvenzgerichte+--',
-              '&Datum1=', '', '&Datum2=', '', '&Name=', '', '&Sitz=', '', '&Abteilungsnr=', '', '&Registerzeichen=', '--', '&Lfdnr=',
-              '', '&Jahreszahl=', '--', '&Registerart=','--+keine+Angabe+--', '&select_registergericht=&Registergericht=', '--+keine+Angabe+--', '&Registernummer=',
-              '', '&Gegenstand=','--+Alle+Bekanntmachungen+innerhalb+des+Verfahrens+--', '&matchesperpage=100&sortedby=Datum&page=', '1', '#Ergebnis']
+_lookup_cache = {}
+_lookup_dir = ""
+_lookup_ttl = 2592000
 
 _respe = [""] * 3
 _respe[0] = ": No records found"
@@ -37,14 +48,6 @@ _respe[1] = """For the detailed search an insolvency court needs to be specified
 _respe[2] = """For the detailed search family / firm name, domicile of debtor or the bankruptcy court file number
       or in case of a firm the registration number and the registration court need to be specified."""
 
-def _urlencode(text = ""):
-    inp = ['ü', 'ö', 'ä', 'Ü', 'Ö', 'Ä', 'ß', '§', '(', ')', '/', '?', '*']
-    outp = ['%FC', '%F6', '%E4', '%DC' , '%D6', '%C4', '%DF', '%A7', '%28', '%29', '%2F', '%3F', '%2A'] 
-    dict_urlenc = dict(zip(inp, outp))
-    for key in dict_urlenc.keys():
-     text = text.strip().replace(key, dict_urlenc[key]) 
-    return text
-
 def _prepare_argument(answer="", choices ="", empty = ""):
    answer = answer.strip()
    if len(answer)!=0:
@@ -53,9 +56,384 @@ def _prepare_argument(answer="", choices ="", empty = ""):
          selection = empty
    return selection
 
-def regcourts_scr():
+def set_session(session = None, pool_size = 10, keep_alive = True, timeout = 30, headers = None):
+ """Configures the HTTP session shared by all scraping functions of the library, so that connections to 
+    alt.insolvenzbekanntmachungen.de are set up once per run and reused for all subsequent requests.
+    
+    Args:
+        session (requests.Session): (optional) A user-supplied session, otherwise a new session is created
+        pool_size (int): The number of pooled connections kept per host
+        keep_alive (bool): Shall connections be kept open and reused?
+        timeout (float or tuple): The connect and read timeout in seconds used for each request
+        headers (dict): (optional) Default headers sent with each request
+        
+    Returns:
+        requests.Session: The shared session
+ """
+ global _session, _timeout
+ if session is None:
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections = pool_size, pool_maxsize = pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+ if headers:
+    session.headers.update(headers)
+ if keep_alive == False:
+    session.headers["Connection"] = "close"
+ _session = session
+ _timeout = timeout
+ return session
+
+class _TokenBucket:
+    '''Limits the request rate to `rate` requests per second with bursts of up to `burst` requests. If `adaptive`, 
+    the rate is halved whenever the website throttles (down to `min_rate`) and recovers additively with each success.'''
+    def __init__(self, rate, burst = 1, adaptive = True, min_rate = 0.5):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.adaptive = adaptive
+        self.min_rate = min(min_rate, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    def reserve(self):
+        '''Takes a token and returns the number of seconds to wait for it.'''
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate) - 1
+            self.updated = now
+            return -self.tokens / self.rate if self.tokens < 0 else 0
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+    def throttled(self):
+        if self.adaptive:
+            with self.lock:
+                self.rate = max(self.min_rate, self.rate / 2)
+    def succeeded(self):
+        if self.adaptive:
+            with self.lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+class _CircuitBreaker:
+    '''Opens after `threshold` consecutive requests failed all retries, so that further requests fail immediately instead of 
+    hitting an overloaded website. After `reset_timeout` seconds a single trial request is let through, which closes 
+    the circuit on success and opens it again on failure. The breaker is asked once per request, including its retries,
+    and each allowed request has to end with succeeded(), failed() or - if abandoned, for example cancelled - released().'''
+    def __init__(self, threshold = 5, reset_timeout = 60):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened = None
+        self.trial = False
+        self.lock = threading.Lock()
+    def allow(self):
+        with self.lock:
+            if self.opened is None:
+                return True
+            if self.trial == False and time.monotonic() - self.opened >= self.reset_timeout:
+                self.trial = True
+                return True
+            return False
+    def succeeded(self):
+        with self.lock:
+            self.failures = 0
+            self.opened = None
+            self.trial = False
+    def failed(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial or (self.threshold > 0 and self.failures >= self.threshold):
+                self.opened = time.monotonic()
+                self.trial = False
+    def released(self):
+        '''Lets the next request through as trial, if the trial request was abandoned before it succeeded or failed.'''
+        with self.lock:
+            self.trial = False
+
+_limiter = None
+_breaker = _CircuitBreaker()
+_retries = 3
+_backoff = 0.5
+_max_backoff = 30
+
+def set_rate_limit(rate = 0, burst = 1, adaptive = True, min_rate = 0.5, retries = 3, backoff = 0.5, max_backoff = 30,
+                   failure_threshold = 5, reset_timeout = 60):
+ """Configures the rate limiting and retry layer all requests of the library pass through. Requests failing with 
+    a server error (5xx), throttling (429), a timeout, a dropped connection or a malformed result page are retried 
+    with exponential backoff and jitter. Consecutive failures open a circuit breaker, which pauses all requests.
+    
+    Args:
+        rate (float): The maximum number of requests per second (default: 0, unlimited)
+        burst (int): The number of requests which may be sent at once before the rate applies
+        adaptive (bool): Shall the rate be halved whenever the website throttles and recover with each success?
+        min_rate (float): The minimum number of requests per second of the adaptive rate
+        retries (int): The number of retries of a failed request
+        backoff (float): The base of the exponential backoff in seconds
+        max_backoff (float): The maximum backoff in seconds
+        failure_threshold (int): The number of consecutive failures opening the circuit breaker (0: never)
+        reset_timeout (float): The number of seconds the circuit breaker stays open
+ """
+ global _limiter, _breaker, _retries, _backoff, _max_backoff
+ _limiter = _TokenBucket(rate, burst, adaptive, min_rate) if rate > 0 else None
+ _breaker = _CircuitBreaker(failure_threshold, reset_timeout)
+ _retries = retries
+ _backoff = backoff
+ _max_backoff = max_backoff
+
+def _valid_search_page(content):
+    '''Is the content a search result page, with either a number of results or a message of the search form?'''
+    return re.search(b'Treffer|keine mit Ihrer Suchanfrage|Detailsuche ein Insolvenzgericht|Suchkriterium den Familiennamen', content) is not None
+
+class _MalformedPage(ValueError):
+    pass
+
+def _valid_announcement(content):
+    '''Is the content an announcement, which contains the keywords tag parsed by insol_proc_scrpar()?'''
+    return re.search(b'keywords', content, re.IGNORECASE) is not None
+
+def _get(url, validate = None, retry_malformed = True):
+    '''Requests the URL through the shared session, which is created with default settings on first use. The request 
+    passes the rate limiter and circuit breaker and is retried on server errors, timeouts and, if `validate` returns 
+    False for the content, on malformed pages - unless `retry_malformed` is False. Client errors (4xx) are returned 
+    without retry. The circuit breaker is asked once per request, so that the retries of its trial request are let 
+    through. Each attempt is emitted as "request" event.'''
+    if _session is None:
+        set_session()
+    if _breaker.allow() == False:
+        _emit("circuit_open", url = url)
+        raise ConnectionError('Requests are paused after repeated failures of the website (circuit breaker open).')
+    resolved = False
+    try:
+        for attempt in range(_retries + 1):
+            if _limiter is not None:
+                _limiter.acquire()
+            wait = None
+            response = None
+            start = time.perf_counter()
+            try:
+                response = _session.get(url, timeout = _timeout)
+                if response.status_code == 429 or response.status_code >= 500:
+                    wait = response.headers.get("Retry-After")
+                    response.raise_for_status()
+                if response.status_code < 400 and validate is not None and validate(response.content) == False:
+                    raise _MalformedPage('The website returned a malformed page for ' + url)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                _emit("request", url = url, status = None if response is None else response.status_code, attempt = attempt,
+                      bytes = 0 if response is None else len(response.content), seconds = time.perf_counter() - start, error = str(e))
+                if isinstance(e, _MalformedPage) and retry_malformed == False:
+                    # The website answered, the page of the stale session is retried by the caller with a fresh session
+                    _breaker.succeeded()
+                    resolved = True
+                    raise
+                if _limiter is not None:
+                    _limiter.throttled()
+                if attempt == _retries:
+                    _breaker.failed()
+                    resolved = True
+                    raise
+                delay = random.uniform(0, min(_max_backoff, _backoff * 2 ** attempt))
+                if wait is not None and wait.isdigit():
+                    delay = max(delay, min(_max_backoff, int(wait)))
+                _emit("retry", url = url, attempt = attempt + 1, delay = delay, error = str(e))
+                time.sleep(delay)
+                continue
+            _emit("request", url = url, status = response.status_code, attempt = attempt, bytes = len(response.content),
+                  seconds = time.perf_counter() - start, error = "")
+            _breaker.succeeded()
+            resolved = True
+            if _limiter is not None:
+                _limiter.succeeded()
+            return response
+    finally:
+        if resolved == False:
+            _breaker.released()
+
+def _fetch_html(urls, workers = 1, max_per_host = 4, parse = None, validate = None):
+    '''Fetches the content of each URL with up to `workers` threads, of which at most `max_per_host` 
+    request the same host at a time. Returns a list of (content, error) tuples in the order of the entered URLs, 
+    failed requests return None as content and the error message, so that a single failure does not abort the run.
+    If `parse` is given, it is applied to the content within the worker thread and its result is returned instead.
+    `validate` is passed on to _get(). A malformed page of a URL with a PHP SESSION ID is taken as a stale session, 
+    the URL is requested again with a fresh session ID.'''
+    semaphores = {}
+    lock = threading.Lock()
+    def _fetch(url):
+        host = urlparse(url).netloc
+        with lock:
+            if host not in semaphores:
+                semaphores[host] = threading.BoundedSemaphore(max(1, max_per_host))
+        with semaphores[host]:
+            try:
+                stale = _session_id_pattern.search(url)
+                try:
+                    response = _get(url, validate, stale is None)
+                except _MalformedPage:
+                    if stale is None:
+                        raise
+                    fresh = _fresh_session_id(stale.group(1))
+                    if fresh is not None:
+                        url = url[:stale.start(1)] + fresh + url[stale.end(1):]
+                    response = _get(url, validate)
+                response.raise_for_status()
+                if parse is not None:
+                    return parse(response.content), ""
+                return response.content, ""
+            except Exception as e:
+                return None, str(e)
+    if workers <= 1:
+        return [_fetch(url) for url in urls]
+    with ThreadPoolExecutor(max_workers = workers) as executor:
+        return list(executor.map(_fetch, urls))
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError('The zstd compression requires the zstandard package: pip install zstandard')
+    return zstandard
+
+def _encode_html(content, html_format = "repr", compression = ""):
+    '''Returns the content of a scraped announcement in the storage format of insol_proc_scr().'''
+    if content is None:
+        return None
+    if html_format == "text":
+        return UnicodeDammit(content, is_html = True).unicode_markup
+    if html_format == "bytes":
+        if compression == "gzip":
+            return gzip.compress(content)
+        if compression == "zstd":
+            return _zstd().ZstdCompressor().compress(content)
+        return content
+    return "'" + str(content) + "'"
+
+def _read_html(scraped_html):
+    '''Returns the scraped html content of any storage format of insol_proc_scr() as `str`, bytes are decompressed 
+    and decoded with the encoding declared by the page.'''
+    if type(scraped_html) != bytes:
+        return scraped_html
+    return UnicodeDammit(_decompress(scraped_html), is_html = True).unicode_markup
+
+def _decompress(content):
+    if content[:2] == b'\x1f\x8b':
+        return gzip.decompress(content)
+    if content[:4] == b'\x28\xb5\x2f\xfd':
+        return _zstd().ZstdDecompressor().decompress(content)
+    return content
+
+def _response_html(scraped_html):
+    '''Returns the response of a scraped announcement from any storage format of insol_proc_scr() as `bytes`, so that 
+    it can be converted to another format with _encode_html(). Decoded html is encoded with the encoding declared by the 
+    page, by default windows-1252 as the pages of the portal.'''
+    if scraped_html is None:
+        return None
+    if type(scraped_html) == bytes:
+        return _decompress(scraped_html)
+    if scraped_html[:3] in ("'b'", "'b\""):
+        return ast.literal_eval(scraped_html[1:-1])
+    try:
+        return scraped_html.encode(EncodingDetector.find_declared_encoding(scraped_html, is_html = True) or "windows-1252", errors = "xmlcharrefreplace")
+    except LookupError:
+        return scraped_html.encode("windows-1252", errors = "xmlcharrefreplace")
+
+def _scrape_links(html_page):
+    '''Returns the announcement links of a search result page as list of `str`.'''
+    soup = BeautifulSoup(html_page, 'html.parser')
+    return [str(link) for link in soup.select('a[href^="javascript:"]')]
+
+def set_lookup_cache(directory = "", ttl = 2592000):
+ """Configures the cache of the court and registry lookup tables, which are scraped from the search page of 
+    alt.insolvenzbekanntmachungen.de and change only a few times a year. The lookup tables are kept in memory and 
+    as snapshot on disk, both are reused until they are older than `ttl` seconds.
+    
+    Args:
+        directory (str): The directory of the snapshot (default: ~/.cache/InsolvencyAnnouncementsGer)
+        ttl (int): The time to live of the lookup tables in seconds (default: 30 days)
  """
- Scrapes the registration courts of all register types.
+ global _lookup_dir, _lookup_ttl
+ _lookup_dir = directory
+ _lookup_ttl = ttl
+
+def _lookup_path():
+    directory = _lookup_dir
+    if len(directory) == 0:
+        directory = os.path.join(os.path.expanduser("~"), ".cache", "InsolvencyAnnouncementsGer")
+    return os.path.join(directory, "lookups.json")
+
+def _scrape_lookups():
+    '''Scrapes the registration courts of each register type and the insolvency courts of each state from the search page.'''
+    html_page = _get("".join(_default_url)).content
+    text = UnicodeDammit(html_page).unicode_markup
+    registration_courts = {}
+    for i in _registers:
+        s = r'RegisterArray\[\"'+ i + r'\"\] = new Array\(' + r'(.+?)\);' 
+        courts = (re.search(s, text).group(1)).replace('"', '').split(",")
+        registration_courts[i] = [x for x in courts if x!= "-- keine Angabe --"] 
+    insolvency_courts = {}
+    for i, y in zip(_states, _states_a):
+        s = r'BundeslandArray\[\"'+ i + r'\"\] = new Array\(' + r'(.+?)\);' 
+        insolvency_courts[y] = (re.search(s, text).group(1)).replace('"', '').split(",")
+    return {"time": time.time(), "registration_courts": registration_courts, "insolvency_courts": insolvency_courts}
+
+def _lookups(refresh = False):
+    '''Returns the lookup tables from memory, from the snapshot on disk or - if both are missing or expired - from the website.'''
+    global _lookup_cache
+    if refresh == False and _lookup_cache and time.time() - _lookup_cache["time"] < _lookup_ttl:
+        return _lookup_cache
+    path = _lookup_path()
+    if refresh == False and os.path.exists(path):
+        with open(path, encoding = "utf-8") as f:
+            lookups = json.load(f)
+        if time.time() - lookups["time"] < _lookup_ttl:
+            _lookup_cache = lookups
+            return lookups
+    lookups = _scrape_lookups()
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    with open(path + ".tmp", "w", encoding = "utf-8") as f:
+        json.dump(lookups, f, ensure_ascii = False)
+    os.replace(path + ".tmp", path)
+    _lookup_cache = lookups
+    return lookups
+
+def refresh_lookups():
+ """Scrapes the court and registry lookup tables anew, replacing the cached tables in memory and on disk.
+ 
+ Raises:
+    Exception: If target website does not not respond or if there is no internet connection.
+ """
+ _lookups(refresh = True)
+
+def court_state_dict(refresh = False):
+ """
+ Returns the German state abbreviation of each insolvency court from the cached lookup tables.
+ 
+ Args:
+     refresh (bool): Shall the lookup tables be scraped anew?
+ 
+ Returns:
+     dict: {insolvency court (as `str`): German state abbreviation (as `str`)}
+ """
+ return {court: state for state, courts in _lookups(refresh)["insolvency_courts"].items() for court in courts}
+
+def registry_courts_dict(refresh = False):
+ """
+ Returns the registration courts of each register type from the cached lookup tables.
+ 
+ Args:
+     refresh (bool): Shall the lookup tables be scraped anew?
+ 
+ Returns:
+     dict: {register type {"GnR", "HRA", "HRB", "PR", "VR"} (as `str`): registration courts (as `list` of `str`)}
+ """
+ return {reg: list(courts) for reg, courts in _lookups(refresh)["registration_courts"].items()}
+
+def regcourts_scr(refresh = False):
+ """
+ Scrapes the registration courts of all register types. The result is cached, see set_lookup_cache().
+ 
+ Args:
+     refresh (bool): Shall the cached registration courts be scraped anew?
  
  Returns:
      A Dataframe, data columns are as follows: 
@@ -68,26 +446,21 @@ def regcourts_scr():
     Exception: If target website does not not respond or if there is no internet connection.
  
  """    
+ df = pd.DataFrame(columns=["registration_court", "reg"])
  try:
-    html_page = requests.get("".join(_default_url)).content
-    text = BeautifulSoup(html_page, 'html.parser').get_text()
-    df = pd.DataFrame(columns=["registration_court", "reg"])
-    for i in _registers:
-        temp = pd.DataFrame()
-        s = 'RegisterArray\[\"'+ i + '\"\] = new Array\(' + '(.+?)\);' 
-        courts = (re.search(s, text).group(1)).replace('"', '').split(",")
-        courts = [x for x in courts if x!= "-- keine Angabe --"] 
-        temp["registration_court"] = courts
-        temp["reg"] = i
-        df = df.append(temp)
-    df = df.reset_index(drop=True)
+    courts = registry_courts_dict(refresh)
+    df = pd.DataFrame([(court, reg) for reg in _registers for court in courts[reg]], columns=["registration_court", "reg"])
  except: 
-    print("Target website may not respond or the internet connection may have caused the error.")
+    _print("Target website may not respond or the internet connection may have caused the error.")
  return df 
 
-def inscourts_scr():
+def inscourts_scr(refresh = False):
  """
- Scrapes the insolvency courts of each German state from the webpage alt.insolvenzbekanntmachungen.de.
+ Scrapes the insolvency courts of each German state from the webpage alt.insolvenzbekanntmachungen.de. 
+ The result is cached, see set_lookup_cache().
+
+ Args:
+     refresh (bool): Shall the cached insolvency courts be scraped anew?
 
  Returns:
      A Dataframe, data columns are as follows: 
@@ -98,23 +471,163 @@ def inscourts_scr():
  Raises:
     Exception: If target website does not not respond or if there is no internet connection.
  """ 
+ df = pd.DataFrame(columns=["insolvency_court", "state_abbr"])
  try:
-    html_page = requests.get("".join(_default_url)).content
-    text = BeautifulSoup(html_page, 'html.parser').get_text() 
-    df = pd.DataFrame(columns=["insolvency_court", "state_abbr"])
-    for i, y in zip(_states, _states_a):
-       temp = pd.DataFrame()
-       s = 'BundeslandArray\[\"'+ i + '\"\] = new Array\(' + '(.+?)\);' 
-       courts = (re.search(s, text).group(1))
-       courts = courts.replace('"', '').split(",") 
-       temp["insolvency_court"] = courts
-       temp["state_abbr"] = y
-       df = df.append(temp)
-    df = df.reset_index(drop=True)
+    courts = _lookups(refresh)["insolvency_courts"]
+    df = pd.DataFrame([(court, y) for y in _states_a for court in courts[y]], columns=["insolvency_court", "state_abbr"])
  except: 
-    print("Target website may not respond or the internet connection may have caused the error.")
+    _print("Target website may not respond or the internet connection may have caused the error.")
  return df 
 
+def _insol_proc_scr_steps(reg, state, date_from, date_to, name, domicile, department_number, register_reference, seq_number,
+                          year, reg_court, reg_number, subject, search_type, ins_court, scrape_html, store, html_format, compression, chunksize,
+                          strict = False):
+ '''Runs the search of insol_proc_scr() without sending any request itself, so that the blocking and the asyncio 
+    scraping functions share it. Yields ("get", url, validate) for a single page, answered with its content, and 
+    ("fetch", urls, parse, validate) for many pages, answered with the list of (content, error) of _fetch_html(). 
+    Yields ("chunk", df) for each DataFrame of up to `chunksize` rows (0: one DataFrame per registry) and 
+    ("chunk", None) if the search is rejected by the website. If `strict`, a search page or announcement which could 
+    not be scraped raises ValueError instead of being skipped.'''
+ if html_format not in ["repr", "text", "bytes"] or compression not in ["", "gzip", "zstd"]:
+    raise ValueError('html_format needs to be either "repr", "text" or "bytes" and compression either "", "gzip" or "zstd".')
+ if len(compression) != 0 and html_format != "bytes":
+    raise ValueError('A compression requires html_format = "bytes".')
+ _u = list(_default_url)
+    
+ if search_type == "unlimited":
+    search_type = "uneingeschr"
+    
+ args = [search_type, state, ins_court, date_from, date_to, name, domicile, department_number,
+     register_reference, seq_number, year, reg, reg_court, reg_number, subject]
+
+ for i, arg in zip(list(range(3, 33, 2)),args):
+    if len(arg) == 0 and len(_default_url[i]) != 0:
+       _u[i] = _default_url[i]
+    elif type(arg) is list:
+      continue
+    else:
+      _u[i] = _urlencode(str(arg)).replace(" ","+")
+ 
+ if len(reg) == 0:
+    _u[25] = [_u[25]]
+ elif type(reg) == str:      
+    _u[25] = [reg]
+ elif type(reg) == list:      
+    _u[25] = reg
+ 
+ for x in _u[25]:
+    _print('Register type:', x)
+    _u[25] = x
+    if _u[33] != str(1):
+       _u[33] = str(1)
+    url = "".join(_u)
+    with _stage("search", registry = x):
+      html_page = yield ("get", url, _valid_search_page)
+      soup = BeautifulSoup(html_page, 'html.parser')
+      text = soup.find_all('table')[1].find_all('p')[0].find_all('b')[0].get_text()
+    if text.find("Treffer") > 0:
+       search_results = int(re.findall(r'wurden\s*(.*?)Treffer\s*',text)[0])
+    elif text.find("keine mit Ihrer Suchanfrage übereinstimmenden Veröffentlichungen") > 0:
+       _print("Registry", x, _respe[0])
+       _emit("registry", registry = x, results = 0, pages = 1, entries = 0, failed = 0, reused = 0)
+       continue
+    elif text.find("wählen Sie bei der Detailsuche ein Insolvenzgericht aus") > 0: 
+       _print(_respe[1])
+       yield ("chunk", None)
+       return
+    elif text.find("geben Sie als Suchkriterium den Familiennamen") > 0:
+       _print(_respe[2])
+       yield ("chunk", None)
+       return
+    else: 
+       _print('Website returns:', text)
+       yield ("chunk", None)
+       return
+    max_pages = -(-search_results // 100)
+    _print('Number of search results:', search_results)
+    _print('Scrape', max_pages, 'pages')
+    links = [str(link) for link in soup.select('a[href^="javascript:"]')]
+    failed = 0
+    reused = 0
+    _print('Scraping page:', _u[33])
+    if max_pages > 1:
+      _print("Registry", x, ": Continuing with search pages 2 to", max_pages)
+      pages = []
+      for i in range(2, max_pages + 1):
+        _u[33] = str(i)
+        pages.append("".join(_u))
+      with _stage("listing", registry = x, rows = max_pages - 1):
+        results = yield ("fetch", pages, _scrape_links, _valid_search_page)
+        for i, (page_links, error) in enumerate(results, start = 2):
+          if page_links is None:
+              _print("Registry", x, ": Failed to scrape search page", i, "-", error)
+              failed += 1
+              continue
+          links.extend(page_links)
+      if strict and failed != 0:
+        raise ValueError("Registry " + x + ": " + str(failed) + " of " + str(max_pages) + " search pages could not be scraped.")
+    temp = pd.DataFrame(links, columns = ['href'])
+    temp = temp[temp['href'].astype(str).str.startswith('<a href="javascript:NeuFenster')].reset_index(drop=True)
+    temp['href'] = temp['href'].apply(lambda x: "'" + str(x) + "'") 
+    temp['registry'] = x
+    temp['scrape_date'] = date.today()
+    temp['url'] = temp['href'].astype(str).apply(lambda x: re.findall(r"cgi-bin\s*(.*?)\s*'",x)[0])
+    temp['url'] = _u[0]+ temp["url"].apply(html.unescape)
+    temp = temp[['scrape_date', 'registry', 'url', 'href']] 
+    if scrape_html == True:
+        _print("Registry", x, ": Scraping HTML content.")
+    step = chunksize if chunksize > 0 else max(len(temp), 1)
+    for start in range(0, len(temp), step):
+        chunk = temp.iloc[start:start + step].copy()
+        if scrape_html == True:
+            keys = [announcement_key(url) for url in chunk['url']]
+            stored = {}
+            if len(store) != 0:
+                stored = store_read(store, keys)
+                stored = dict(zip(stored['key'], stored['scraped_html']))
+            urls = [url for url, key in zip(chunk['url'], keys) if key not in stored]
+            with _stage("detail", registry = x, rows = len(urls)):
+                pages = dict(zip(urls, (yield ("fetch", urls, None, _valid_announcement))))
+            for url, (content, error) in pages.items():
+                if content is None:
+                    _print("Registry", x, ": Failed to scrape", url, "-", error)
+                    failed += 1
+                    if strict:
+                        raise ValueError("Registry " + x + ": Failed to scrape " + url + " - " + error)
+            chunk['scraped_html'] = [_encode_html(_response_html(stored[key]) if key in stored else pages[url][0], html_format, compression)
+                                     for url, key in zip(chunk['url'], keys)]
+            chunk['scrape_error'] = ["" if key in stored else pages[url][1] for url, key in zip(chunk['url'], keys)]
+            if len(store) != 0:
+                with _stage("store", registry = x, rows = len(chunk)):
+                    store_write(chunk, store)
+                reused += len(chunk) - len(urls)
+                _print("Registry", x, ": Reused", len(chunk) - len(urls), "stored entries.")
+        yield ("chunk", chunk)
+    _print('Registry', x, ': Scraped', len(temp['url']), 'entries.')
+    _emit("registry", registry = x, results = search_results, pages = max_pages, entries = len(temp), failed = failed, reused = reused)
+
+def _insol_proc_scr(reg, state, date_from, date_to, name, domicile, department_number, register_reference, seq_number,
+                    year, reg_court, reg_number, subject, search_type, ins_court, scrape_html, workers, max_per_host, store, 
+                    html_format, compression, chunksize, strict = False):
+ '''Yields the scraped announcements of insol_proc_scr() as DataFrames of up to `chunksize` rows (0: one DataFrame per registry). 
+    Yields None if the search is rejected by the website.'''
+ steps = _insol_proc_scr_steps(reg, state, date_from, date_to, name, domicile, department_number, register_reference, seq_number,
+                               year, reg_court, reg_number, subject, search_type, ins_court, scrape_html, store, html_format, compression, chunksize,
+                               strict)
+ reply = None
+ while True:
+    try:
+      step = steps.send(reply)
+    except StopIteration:
+      return
+    reply = None
+    if step[0] == "get":
+      reply = _get(step[1], step[2]).content
+    elif step[0] == "fetch":
+      reply = _fetch_html(step[1], workers, max_per_host, parse = step[2], validate = step[3])
+    else:
+      yield step[1]
+
 def insol_proc_scr(reg = "",
                    state = "",
                    date_from = "", 
@@ -130,7 +643,12 @@ def insol_proc_scr(reg = "",
                    subject = "",
                    search_type = "",
                    ins_court = "",
-                   scrape_html = True):
+                   scrape_html = True,
+                   workers = 1,
+                   max_per_host = 4,
+                   store = "",
+                   html_format = "repr",
+                   compression = ""):
  """Scrapes insolvency proceedings information on alt.insolvenzbekanntmachungen.de.
     Default arguments contain no search specification, with exception of the search type 
     (default: uneingeschr or unlimited). The unlimited search is limited to data released within the last two weeks,
@@ -160,6 +678,14 @@ def insol_proc_scr(reg = "",
         ins_court (str): The insolvency court is required information for a detailed search
         scrape_html (bool): Should the html content of the proceeding get scraped?
         search_type (str): Defines the search type {"detail", "unlimited"/"uneingeschr"}
+        workers (int): The number of search pages and announcements scraped concurrently (default: 1, sequential scraping)
+        max_per_host (int): The maximum number of concurrent requests to the same host
+        store (str): (optional) Path of a local SQLite announcement store. Only announcements not yet contained in the 
+        store are downloaded, all others are read from the store and returned in `html_format`. Newly scraped 
+        announcements are added to the store.
+        html_format (str): The format the html content is kept in, either {"repr", "text", "bytes"}. "repr" is the quoted 
+        representation of the response bytes, "text" the decoded html and "bytes" the unaltered response
+        compression (str): (optional) Compression of the html content for html_format = "bytes", either {"gzip", "zstd"}
         
     Returns:
         Dataframe: 
@@ -169,90 +695,95 @@ def insol_proc_scr(reg = "",
             registry     either {"GnR", "HRA", "HRB", "PR", "VR"} (as `str`)
             url          URL of the scraped proceeding announcement (as `str`)
             href         scraped href information of each observation (as `str`)
-            scraped_html scraped html content of the announcement (as `str`)
+            scraped_html scraped html content of the announcement (as `str`, as `bytes` for html_format = "bytes"),
+                         None if the announcement could not be scraped
+            scrape_error the error of an announcement which could not be scraped, empty if scraped (as `str`)
             ============ ========================================================
             
  """
- _u = _default_url
-    
- if search_type == "unlimited":
-    search_type = "uneingeschr"
-    
- args = [search_type, state, ins_court, date_from, date_to, name, domicile, department_number,
-     register_reference, seq_number, year, reg, reg_court, reg_number, subject]
-
- for i, arg in zip(list(range(3, 33, 2)),args):
-    if len(arg) == 0 and len(_default_url[i]) != 0:
-       _u[i] = _default_url[i]
-    elif type(arg) is list:
-      continue
-    else:
-      _u[i] = _urlencode(str(arg)).replace(" ","+")
- 
- if len(reg) == 0:
-    _u[25] = [_u[25]]
- elif type(reg) == str:      
-    _u[25] = [reg]
- elif type(reg) == list:      
-    _u[25] = reg
- 
- df = pd.DataFrame()
- for x in _u[25]:
-    print('Register type:', x)
-    _u[25] = x
-    if _u[33] != str(1):
-       _u[33] = str(1)
-    url = "".join(_u)
-    html_page = requests.get(url).content
-    soup = BeautifulSoup(html_page, 'html.parser')
-    text = soup.find_all('table')[1].find_all('p')[0].find_all('b')[0].get_text()
-    if text.find("Treffer") > 0:
-       search_results = int(re.findall('wurden\s*(.*?)Treffer\s*',text)[0])
-    elif text.find("keine mit Ihrer Suchanfrage übereinstimmenden Veröffentlichungen") > 0:
-       print("Registry", x, _respe[0])
-       continue
-    elif text.find("wählen Sie bei der Detailsuche ein Insolvenzgericht aus") > 0: 
-       print(_respe[1])
+ chunks = []
+ for chunk in _insol_proc_scr(reg, state, date_from, date_to, name, domicile, department_number, register_reference, seq_number,
+                              year, reg_court, reg_number, subject, search_type, ins_court, scrape_html, workers, max_per_host, store, html_format, compression, 0):
+    if chunk is None:
        return
-    elif text.find("geben Sie als Suchkriterium den Familiennamen") > 0:
-       print(_respe[2])
+    chunks.append(chunk)
+ if len(chunks) == 0:
+    return pd.DataFrame()
+ return pd.concat(chunks)
+
+def insol_proc_scr_iter(reg = "",
+                   state = "",
+                   date_from = "", 
+                   date_to = "",
+                   name = "",
+                   domicile = "",
+                   department_number = "",
+                   register_reference = "",
+                   seq_number  = "",
+                   year = "",
+                   reg_court = "",
+                   reg_number = "",
+                   subject = "",
+                   search_type = "",
+                   ins_court = "",
+                   scrape_html = True,
+                   workers = 1,
+                   max_per_host = 4,
+                   store = "",
+                   html_format = "repr",
+                   compression = "",
+                   chunksize = 1000):
+ """Scrapes insolvency proceedings information on alt.insolvenzbekanntmachungen.de like insol_proc_scr(), but yields 
+    the announcements in DataFrames of up to `chunksize` rows as soon as they are scraped, instead of returning a single 
+    DataFrame at the end. Memory use therefore stays flat independent of the number of search results.
+    
+    Args:
+        chunksize (int): The maximum number of announcements per yielded DataFrame (0: one DataFrame per registry)
+        further arguments: See insol_proc_scr()
+        
+    Yields:
+        Dataframe: 
+            Containing unparsed insolvency proceeding data with the data columns of insol_proc_scr()
+ """
+ for chunk in _insol_proc_scr(reg, state, date_from, date_to, name, domicile, department_number, register_reference, seq_number,
+                              year, reg_court, reg_number, subject, search_type, ins_court, scrape_html, workers, max_per_host, store, html_format, compression, chunksize):
+    if chunk is None:
        return
-    else: 
-       print('Website returns:', text)
+    yield chunk
+
+def _insol_proc_scr_strict(**arguments):
+ '''Returns the result of insol_proc_scr(**arguments), but raises ValueError if a search page or announcement could 
+    not be scraped, so that the shards of jobs and the units of work queues are not completed with missing announcements.'''
+ bound = inspect.signature(insol_proc_scr).bind(**arguments)
+ bound.apply_defaults()
+ chunks = []
+ for chunk in _insol_proc_scr(*bound.args, 0, strict = True):
+    if chunk is None:
        return
-    max_pages = -(-search_results // 100)
-    print('Number of search results:', search_results)
-    print('Scrape', max_pages, 'pages')
-    links = soup.select('a[href^="javascript:"]')
-    print('Scraping page:', _u[33])
-    temp = pd.DataFrame(links)
-    if max_pages > 1:
-      for i in range(2, max_pages + 1):
-        print("Registry", x, ": Continuing with search page:", i)
-        _u[33] = str(i)
-        url = "".join(_u)
-        html_page  = requests.get(url).content
-        soup = BeautifulSoup(html_page, 'html.parser')
-        links = soup.select('a[href^="javascript:"]')
-        temp = temp.append(links, ignore_index=True)
-    temp.columns = ['href']
-    temp = temp[temp['href'].astype(str).str.startswith('<a href="javascript:NeuFenster')].reset_index(drop=True)
-    temp['href'] = temp['href'].apply(lambda x: "'" + str(x) + "'") 
-    temp['registry'] = x
-    temp['scrape_date'] = date.today()
-    temp['url'] = temp['href'].astype(str).apply(lambda x: re.findall("cgi-bin\s*(.*?)\s*'",x)[0])
-    temp['url'] = _u[0]+ temp["url"].apply(html.unescape)
-    temp = temp[['scrape_date', 'registry', 'url', 'href']] 
-    if scrape_html == True:
-        print("Registry", x, ": Scraping HTML content.")
-        temp['scraped_html'] = temp['url'].apply(lambda url: requests.get(url).content).apply(lambda x: "'" + str(x) + "'") 
-    print('Registry', x, ': Scraped', len(temp['url']), 'entries.')
-    df = df.append(temp)
- return df
+    chunks.append(chunk)
+ if len(chunks) == 0:
+    return pd.DataFrame()
+ return pd.concat(chunks)
+
+def _fresh_session_id(stale = None, max_age = None):
+    '''Returns a PHP SESSION ID taken from the links of a search page, which is cached for `max_age` seconds (default: 
+    _session_id_max_age). A cached ID equal to `stale` is replaced, unless it was fetched within the last 10 seconds. 
+    Returns None if the search lists no announcements.'''
+    with _session_id_lock:
+        session_id, fetched = _session_id
+        age = time.monotonic() - fetched
+        if session_id is None or (session_id == stale and age > 10) or age > (_session_id_max_age if max_age is None else max_age):
+            html_page = _get("".join(_default_url), _valid_search_page).content
+            match = re.search(rb'NeuFenster\(\'[^\']*PHPSESSID=([^&\'"\s#]+)', html_page)
+            if match is None:
+                return None
+            _session_id[:] = [match.group(1).decode("latin-1"), time.monotonic()]
+            _emit("session", session_id = _session_id[0])
+        return _session_id[0]
 
 def update_url(url = ""):
  """Updates the PHP SESSION ID of the as URL entered link of proceedings from alt.insolvenzbekanntmachungen.de, 
-  which turn invalid after some time. 
+  which turn invalid after some time. The fresh session ID is cached, see update_urls().
   
   Args:
         url (str): The URL of a proceeding announcement from alt.insolvenzbekanntmachungen.de containing a PHP SESSION ID
@@ -264,26 +795,46 @@ def update_url(url = ""):
         ValueError: If the entered URL cannot be processed
  """            
  try:
-    html_page = requests.get("".join(_default_url)).content
-    soup = BeautifulSoup(html_page, 'html.parser') 
-    text = soup.get_text()
-    if text.find("Es wurden keine mit Ihrer Suchanfrage übereinstimmenden Veröffentlichungen gefunden") > 0:
-          print("Replacement of the PHP Session ID is currently not possible due to no current records.")
+    new = _fresh_session_id()
+    if new is None:
+          _print("Replacement of the PHP Session ID is currently not possible due to no current records.")
           return
-    else: 
-          link = soup.select('a[href^="javascript:NeuFenster"]')[0]
-          new = re.search("PHPSESSID\=(.+?)\&", str(link)).group(1)
-          old = re.search("PHPSESSID\=(.+?)\&", str(url)).group(1)
-          url_new = url.replace(old, new)
-          print("Generated PHPSESSID:", new)
+    old = _session_id_pattern.search(str(url)).group(1)
+    url_new = url.replace(old, new)
+    _print("Generated PHPSESSID:", new)
  except: 
     raise ValueError('The entered ULR' + url + ' cannot be processed.') 
  return url_new
 
+def update_urls(df = "", columns = ["url", "href"], max_age = 600):
+ """Updates the PHP SESSION IDs of all links of proceedings in a DataFrame - for instance an archived output of 
+  insol_proc_scr() - at once. A single fresh session ID is requested and cached for `max_age` seconds, so that 
+  repeated calls do not request the website again.
+  
+  Args:
+        df (Dataframe or Series): The dataframe with the URL columns, or a single column of URLs
+        columns (list of str): The columns of the dataframe containing PHP SESSION IDs to be updated, missing columns are skipped
+        max_age (float): The number of seconds a fetched session ID is reused
+        
+  Returns:
+        A copy of the dataframe or series with the newly generated PHP SESSION ID, None if no session ID can currently be generated
+ """
+ new = _fresh_session_id(max_age = max_age)
+ if new is None:
+    _print("Replacement of the PHP Session ID is currently not possible due to no current records.")
+    return
+ if isinstance(df, pd.Series):
+    return df.str.replace(_session_id_pattern, "PHPSESSID=" + new, regex = True)
+ df = df.copy()
+ for column in columns:
+    if column in df.columns:
+      df[column] = df[column].str.replace(_session_id_pattern, "PHPSESSID=" + new, regex = True)
+ return df
+
 def regcourts_state_scr():
  ''' Function scrapes the register courts of each German state. It returns a tuple, containing lists of all 16 states in alpabetical order. Please note: source is Wikipedia (URL = https://de.wikipedia.org/wiki/Liste_deutscher_Registergerichte)'''  
  url = "https://de.wikipedia.org/wiki/Liste_deutscher_Registergerichte"
- html_page = requests.get(url).content
+ html_page = _get(url).content
  soup = BeautifulSoup(html_page, 'html.parser')
  states_d = dict(zip(_states, _states_a))   
  for key, value in states_d.items(): 
@@ -295,16 +846,126 @@ def regcourts_state_scr():
         if '\n' in globals()[f'list_{value}']: globals()[f'list_{value}'].remove('\n')
  return list_bw, list_by, list_be, list_bb, list_hb, list_hh, list_he, list_mv, list_ns, list_nw, list_rp, list_sl, list_sn, list_st, list_sh, list_th
 
-def insol_proc_scrpar(df = "", url = "", scraped_html= "", convert_html_to_text = True, register_type = False):
+class _TextTarget:
+    '''Collects the text from the events of the lxml html parser as BeautifulSoup(scraped_html, 'lxml').get_text() 
+    does - skipping scripts, styles, templates and comments and reducing whitespace-only strings outside of pre 
+    and textarea tags to a single newline or space - but without building a document tree.'''
+    def __init__(self):
+        self.text = []
+        self.pending = []
+        self.skip = 0
+        self.preserve = 0
+    def _flush(self):
+        if len(self.pending) != 0:
+            data = "".join(self.pending)
+            self.pending = []
+            if self.skip == 0:
+                if self.preserve == 0 and data.strip(' \n\t\f\r') == '':
+                    data = '\n' if '\n' in data else ' '
+                self.text.append(data)
+    def start(self, tag, attrib):
+        self._flush()
+        if tag in ('script', 'style', 'template'):
+            self.skip += 1
+        elif tag in ('pre', 'textarea'):
+            self.preserve += 1
+    def end(self, tag):
+        self._flush()
+        if tag in ('script', 'style', 'template'):
+            self.skip -= 1
+        elif tag in ('pre', 'textarea'):
+            self.preserve -= 1
+    def data(self, data):
+        self.pending.append(data)
+    def comment(self, text):
+        self._flush()
+    def pi(self, target, data = None):
+        self._flush()
+    def doctype(self, *args):
+        self._flush()
+    def close(self):
+        self._flush()
+        return "".join(self.text)
+
+def _get_text(scraped_html):
+    '''Returns the same text as _get_text_lxml(), collected directly from the parser events.'''
+    if type(scraped_html) != str:
+        return None
+    from lxml import etree
+    parser = etree.HTMLParser(target = _TextTarget(), recover = True)
+    parser.feed(scraped_html)
+    return parser.close()
+
+_text_cache = {}
+_text_cache_memory = 0
+_text_cache_used = 0
+_text_cache_lock = threading.Lock()
+_text_cache_local = threading.local()
+
+def set_text_cache(memory = 0):
+ """Configures the cache of insol_proc_scrpar(), which keeps the texts of the latest parsed pages by content hash (see 
+    content_hash()), so that pages fetched again are not converted to text again. The cache is held by each process and 
+    is not used by the out-of-core parsing of insol_proc_scrpar_store().
+    
+    Args:
+        memory (float): The maximum size of the cached texts in MB (default: 0, no cache)
+ """
+ global _text_cache_memory, _text_cache_used
+ with _text_cache_lock:
+    _text_cache_memory = int(memory * 1024 * 1024)
+    _text_cache.clear()
+    _text_cache_used = 0
+
+@contextmanager
+def _without_text_cache():
+    '''Disables the text cache for the parsing within the current thread.'''
+    _text_cache_local.disabled = True
+    try:
+        yield
+    finally:
+        _text_cache_local.disabled = False
+
+def _text_cache_enabled():
+    return _text_cache_memory > 0 and getattr(_text_cache_local, "disabled", False) == False
+
+def _cache_text(key, text):
+    '''Keeps the text of a parsed page by content hash, dropping the oldest texts beyond the memory of set_text_cache().'''
+    global _text_cache_used
+    if text is None:
+        return
+    size = sys.getsizeof(text)
+    with _text_cache_lock:
+        if key in _text_cache or size > _text_cache_memory:
+            return
+        while _text_cache_used + size > _text_cache_memory:
+            _text_cache_used -= sys.getsizeof(_text_cache.pop(next(iter(_text_cache))))
+        _text_cache[key] = text
+        _text_cache_used += size
+
+def _get_text_lxml(scraped_html):
+    if type(scraped_html) != str:
+        return None
+    return BeautifulSoup(scraped_html, 'lxml').get_text()
+
+def _parse_url(df):
+    '''Adds the fields encoded in the announcement URL - state, court, year, file and date_time - to the DataFrame.'''
+    df[['state_abbr','insolvency_court_abbr', 'court_file_number_year', 'court_file_number_2', 'date']] = df.url.str.extract(_key_pattern, expand=False).str.split('/',expand=True)
+    df["time"] = df.date.str[12:20].str.replace("_", ":", regex=False)
+    df["date"] = df.date.str[0:10].str.replace("_", "-", regex=False)
+
+def insol_proc_scrpar(df = "", url = "", scraped_html= "", convert_html_to_text = True, register_type = False, text_parser = "lxml", processes = 1):
  """
  Parses information from the scraped insolvency proceedings - the output from insol_proc_scr() or insol_proc_scrprep() pandas.DataFrame.
  
    Args:
        df (Dataframe): The dataframe as output of insol_proc_scr() or insol_proc_scrprep()
        url (str column): The URL of the proceeding announcement
-       scraped_html (str column): Scraped html content of the proceeding
+       scraped_html (str column): Scraped html content of the proceeding, in any html_format of insol_proc_scr()
        convert_html_to_text (bool): Shall the text be parsed?
        register_type (bool): Shall the register_types be identified and returned? 
+       text_parser (str): The parser used to convert the html to text, either {"lxml", "fast"}. "fast" collects the 
+       text directly from the lxml parser without building a BeautifulSoup document tree and returns the same text
+       processes (int): The number of processes the html is converted to text with (default: 1)
   
    Returns:
        A Dataframe, data columns are as follows: 
@@ -325,36 +986,120 @@ def insol_proc_scrpar(df = "", url = "", scraped_html= "", convert_html_to_text
             date                    date of the insolvency proceeding announcement (as `str`)
             time                    time (UTC Offset: +2:00 hours) (as `str`)
             scraped_text            (optional) parsed text from the html output (as `str`)
+            content_hash            the hash of the page, identical pages are parsed once (see content_hash()) (as `str`)
             ======================  ====================================================================================
  """    
  
  try:
-    content_tag = df.scraped_html.apply(lambda x: re.search('keywords" CONTENT=(.*)head', str(x), re.IGNORECASE).group(1).split('>', 1)[0].split('"', 1)[1].rsplit('"', 1)[0])
-    content_tag = content_tag.str.split('~',expand=True)
-    df[['insolvency_court', 'court_file_number', 'name_debtor', 'domicile_debtor', 'subject',
-        'registration_court', 'register_type', 'register_number', 'registered']] = content_tag
-    df[['state_abbr','insolvency_court_abbr', 'court_file_number_year', 'court_file_number_2', 'date']] = df.url.apply(lambda x: re.search('gerichte/\s*(.*?)\s*.htm',x).group(1)).str.split('/',expand=True)
-    df["time"] = df.date.apply(lambda x: x[12:20]).str.replace("_", ":")
-    df["date"] = df.date.apply(lambda x: x[0:10]).str.replace("_", "-")
-
-    def decode(text = ""):
-      inp = ['Amtsgericht', 'AG', '\\xe4', '\\xc4',  '\\xdf', '\\xfc', '\\xdc', '\\xf6', '\\xd6', '\\xa7', '\\xe9']
-      outp = ['', '', 'ä', 'Ä', 'ß', 'ü', 'Ü', 'ö', 'Ö', '§', 'é']  
-      for key in dict(zip(inp, outp)).keys():
-        text = text.replace(key, dict(zip(inp, outp))[key]).strip() 
-      return text
-    for i in ['insolvency_court', 'name_debtor', 'domicile_debtor', 'subject','registration_court', 'insolvency_court_abbr']:
-      df[i] = df[i].apply(lambda x: html.unescape(x) if type(x) == str else "")
-      df[i] = df[i].apply(lambda x: decode(text = x) if type(x) == str else "")
+    with _stage("parse", rows = len(df)):
+      scraped_html = df.scraped_html.astype(object)
+      raw = (scraped_html.map(type) == bytes).to_numpy()
+      if raw.any():
+        scraped_html = scraped_html.copy()
+        scraped_html.loc[raw] = scraped_html[raw].map(_read_html).to_numpy()
+      hashes = scraped_html.map(content_hash)
+      df["content_hash"] = hashes.to_numpy()
+      # The text of the quoted representation keeps its escape sequences, so it is parsed apart from the decoded page
+      quoted = scraped_html.str.startswith("'b", na=False).to_numpy()
+      hashes = hashes.fillna("").where(~quoted, hashes + "'b")
+      first = (~hashes.duplicated()).to_numpy()
+      pages, page_hashes = scraped_html[first], hashes[first].tolist()
+      take = pd.Index(page_hashes).get_indexer(hashes)
+      content_tag = pages.where(pages.isna(), pages.astype(str)).str.extract(_keywords_pattern, expand=False)
+      if (content_tag.isna() & pages.notna()).any():
+        raise ValueError
+      content_tag = content_tag.iloc[take]
+      content_tag.index = df.index
+      content_tag = content_tag.str.split('~',expand=True).reindex(columns=range(9))
+      df[['insolvency_court', 'court_file_number', 'name_debtor', 'domicile_debtor', 'subject',
+          'registration_court', 'register_type', 'register_number', 'registered']] = content_tag
+      _parse_url(df)
+
+      for i in ['insolvency_court', 'name_debtor', 'domicile_debtor', 'subject','registration_court', 'insolvency_court_abbr']:
+        column = df[i].fillna("")
+        escaped = column.str.contains("&", regex=False).to_numpy()
+        column.loc[escaped] = column[escaped].map(html.unescape).to_numpy()
+        df[i] = column.str.replace(_decode_pattern, lambda m: _decode_table[m.group(0)], regex=True).str.strip()
     if convert_html_to_text == True: 
-      df["scraped_text"] = df.scraped_html.apply(lambda x: BeautifulSoup(x, 'lxml').get_text())
-      df["scraped_text"] = df["scraped_text"].str.split('Bekanntmachung', 1, expand=True)[1].apply(lambda x: x[:-2])
+     with _stage("text", rows = len(df)):
+      get_text = _get_text if text_parser == "fast" else _get_text_lxml
+      cached = _text_cache_enabled()
+      texts = [_text_cache.get((h, text_parser)) if h and cached else None for h in page_hashes]
+      missing = [i for i, h in enumerate(page_hashes) if h and texts[i] is None]
+      missing_pages = pages.iloc[missing]
+      if processes > 1 and len(missing) > 1:
+        with ProcessPoolExecutor(max_workers = processes) as executor:
+          parsed = list(executor.map(get_text, missing_pages, chunksize = max(1, len(missing) // (processes * 4))))
+      else:
+        parsed = list(missing_pages.map(get_text))
+      for i, text in zip(missing, parsed):
+        texts[i] = text
+        if cached:
+          _cache_text((page_hashes[i], text_parser), text)
+      df["scraped_text"] = [texts[i] for i in take]
+      text = df["scraped_text"].str.split('Bekanntmachung', n = 1, expand=True).reindex(columns=range(2))[1].astype(object)
+      text.loc[quoted] = text[quoted].str[:-2].to_numpy()
+      df["scraped_text"] = text
     if register_type == False:
       del df["register_type"]
  except: 
     raise ValueError('The parsing has failed. Are you really using the output from insol_proc_scr() or insol_proc_scrprep() as input?') 
  return df
 
+def insol_proc_scrmeta(df = ""):
+ """
+ Parses the metadata of insolvency proceedings announcements solely from the search result listing - the output of 
+ insol_proc_scr(scrape_html = False) - without downloading any announcement. The court, file number, date and time are 
+ read from the announcement URL, the name and domicile of the debtor from the text of the listed link. 
+ 
+   Args:
+       df (Dataframe): The dataframe as output of insol_proc_scr() or insol_proc_scr_iter()
+  
+   Returns:
+       A Dataframe, data columns are as follows: 
+            ======================  ====================================================================================
+            court_file_number       the court file number as listed (as `str`) 
+            court_file_number_2     the court file number (as `str`) 
+            name_debtor             the name or firm name of the debtor (as `str`)
+            domicile_debtor         the registered domicile or offices location of the debtor (as `str`)
+            state_abbr              German state abbreviations (as `str`)
+            insolvency_court_abbr   the insolvency court abbreviations (as `str`) 
+            court_file_number_year  the last two digits of the year the insovency proceeding was initiated (as `str`) 
+            date                    date of the insolvency proceeding announcement (as `str`)
+            time                    time (UTC Offset: +2:00 hours) (as `str`)
+            ======================  ====================================================================================
+ """
+ try:
+    text = df.href.astype(str).str.extract(_link_text_pattern, expand=False).fillna("")
+    text = text.str.replace(r'<br\s*/?>', '\n', regex=True, flags=re.IGNORECASE).str.replace('<[^>]*>', '', regex=True).map(html.unescape)
+    fields = text.str.extract(_link_pattern)
+    df["court_file_number"] = fields[0].fillna("").str.strip()
+    df["name_debtor"] = fields[1].fillna("").str.strip()
+    df["domicile_debtor"] = fields[2].fillna("").str.strip()
+    _parse_url(df)
+ except: 
+    raise ValueError('The parsing has failed. Are you really using the output from insol_proc_scr() as input?') 
+ return df
+
+def insol_proc_scrpar_iter(chunks, convert_html_to_text = True, register_type = False, text_parser = "lxml", processes = 1):
+ """
+ Parses a stream of scraped insolvency proceedings chunk by chunk - for instance the output of insol_proc_scr_iter(). 
+ Only a single chunk is held in memory at a time, so that the parsed chunks may be persisted as they arrive.
+ 
+   Args:
+       chunks (iterable of Dataframe): The dataframes as output of insol_proc_scr_iter()
+       convert_html_to_text (bool): Shall the text be parsed?
+       register_type (bool): Shall the register_types be identified and returned? 
+       text_parser (str): The parser used to convert the html to text, either {"lxml", "fast"}
+       processes (int): The number of processes the html is converted to text with (default: 1)
+  
+   Yields:
+       A Dataframe for each chunk with the data columns of insol_proc_scrpar()
+ """
+ for chunk in chunks:
+    yield insol_proc_scrpar(chunk, convert_html_to_text = convert_html_to_text, register_type = register_type,
+                            text_parser = text_parser, processes = processes)
+
 def insol_proc_scrprep():  
  '''  
  Prepares arguments prior to the insolvency proceedings scraping. Requires user input, confirm entries with keyboard command Enter.
@@ -0,0 +1,234 @@
+import asyncio
+import random
+import time
+import pandas as pd
+from . import InsolvencyAnnouncementsGer as _core
+from .InsolvencyAnnouncementsGer import _insol_proc_scr_steps, _MalformedPage, _session_id_pattern, _fresh_session_id
+from .InsolvencyAnnouncementsGer_summaries import _state_summary_steps, _index_state_summary
+from .InsolvencyAnnouncementsGer_events import _emit, _stage
+
+def _aiohttp():
+    try:
+        import aiohttp
+    except ImportError:
+        raise ImportError('The asyncio scraping functions require the aiohttp package: pip install aiohttp')
+    return aiohttp
+
+def _client_session(workers = 1, max_per_host = 4):
+    '''Creates an aiohttp session with the timeout and headers of the shared requests session, see set_session().'''
+    aiohttp = _aiohttp()
+    if isinstance(_core._timeout, tuple):
+        timeout = aiohttp.ClientTimeout(sock_connect = _core._timeout[0], sock_read = _core._timeout[1])
+    else:
+        timeout = aiohttp.ClientTimeout(total = _core._timeout)
+    headers = None if _core._session is None else {key: value for key, value in _core._session.headers.items() if key != "Accept-Encoding"}
+    connector = aiohttp.TCPConnector(limit = max(1, workers), limit_per_host = max(1, max_per_host))
+    return aiohttp.ClientSession(connector = connector, timeout = timeout, headers = headers)
+
+async def _get_async(session, url, validate = None, retry_malformed = True):
+    '''Requests the URL like _get() - sharing its rate limiter, circuit breaker, retries and events - without blocking the 
+    event loop. Returns the status and content of the response.'''
+    aiohttp = _aiohttp()
+    if _core._breaker.allow() == False:
+        _emit("circuit_open", url = url)
+        raise ConnectionError('Requests are paused after repeated failures of the website (circuit breaker open).')
+    resolved = False
+    try:
+        for attempt in range(_core._retries + 1):
+            if _core._limiter is not None:
+                await asyncio.sleep(_core._limiter.reserve())
+            wait = None
+            status = None
+            content = b""
+            start = time.perf_counter()
+            try:
+                async with session.get(url) as response:
+                    status = response.status
+                    content = await response.read()
+                    if status == 429 or status >= 500:
+                        wait = response.headers.get("Retry-After")
+                        response.raise_for_status()
+                if status < 400 and validate is not None and validate(content) == False:
+                    raise _MalformedPage('The website returned a malformed page for ' + url)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                _emit("request", url = url, status = status, attempt = attempt, bytes = len(content), seconds = time.perf_counter() - start, error = str(e))
+                if isinstance(e, _MalformedPage) and retry_malformed == False:
+                    # The website answered, the page of the stale session is retried by the caller with a fresh session
+                    _core._breaker.succeeded()
+                    resolved = True
+                    raise
+                if _core._limiter is not None:
+                    _core._limiter.throttled()
+                if attempt == _core._retries:
+                    _core._breaker.failed()
+                    resolved = True
+                    raise
+                delay = random.uniform(0, min(_core._max_backoff, _core._backoff * 2 ** attempt))
+                if wait is not None and wait.isdigit():
+                    delay = max(delay, min(_core._max_backoff, int(wait)))
+                _emit("retry", url = url, attempt = attempt + 1, delay = delay, error = str(e))
+                await asyncio.sleep(delay)
+                continue
+            _emit("request", url = url, status = status, attempt = attempt, bytes = len(content), seconds = time.perf_counter() - start, error = "")
+            _core._breaker.succeeded()
+            resolved = True
+            if _core._limiter is not None:
+                _core._limiter.succeeded()
+            return status, content
+    finally:
+        if resolved == False:
+            _core._breaker.released()
+
+def _advance(steps, reply):
+    '''Sends the reply to the steps and runs them up to their next request, in a worker thread of _send(). Returns 
+    ("stop", value) once the steps are exhausted, as StopIteration cannot be raised through a future.'''
+    try:
+        return steps.send(reply)
+    except StopIteration as stop:
+        return ("stop", stop.value)
+
+async def _send(steps, reply):
+    '''Advances the steps like steps.send() in a worker thread, so that the parsing of the search pages, the store I/O 
+    and the building of the DataFrames between two requests do not block the event loop.'''
+    return await asyncio.to_thread(_advance, steps, reply)
+
+def _close(steps):
+    '''Closes the steps, unless they still run in the worker thread of a cancelled _send(), they are then closed once 
+    they are garbage collected.'''
+    try:
+        steps.close()
+    except ValueError:
+        pass
+
+async def _fetch_html_async(session, urls, workers = 1, parse = None, validate = None):
+    '''Fetches the content of each URL like _fetch_html() with up to `workers` requests in flight. The per host limit 
+    is set by the connector of the session.'''
+    semaphore = asyncio.Semaphore(max(1, workers))
+    async def _fetch(url):
+        async with semaphore:
+            try:
+                stale = _session_id_pattern.search(url)
+                try:
+                    status, content = await _get_async(session, url, validate, stale is None)
+                except _MalformedPage:
+                    if stale is None:
+                        raise
+                    fresh = await asyncio.get_running_loop().run_in_executor(None, _fresh_session_id, stale.group(1))
+                    if fresh is not None:
+                        url = url[:stale.start(1)] + fresh + url[stale.end(1):]
+                    status, content = await _get_async(session, url, validate)
+                if status >= 400:
+                    raise ValueError(str(status) + " Error for url: " + url)
+                if parse is not None:
+                    return await asyncio.to_thread(parse, content), ""
+                return content, ""
+            except Exception as e:
+                return None, str(e)
+    return list(await asyncio.gather(*[_fetch(url) for url in urls]))
+
+async def _insol_proc_scr_async(reg, state, date_from, date_to, name, domicile, department_number, register_reference, seq_number,
+                                year, reg_court, reg_number, subject, search_type, ins_court, scrape_html, workers, max_per_host, store,
+                                html_format, compression, chunksize, session):
+    '''Yields the scraped announcements of insol_proc_scr_async() like _insol_proc_scr(), None if the search is rejected.'''
+    steps = _insol_proc_scr_steps(reg, state, date_from, date_to, name, domicile, department_number, register_reference, seq_number,
+                                  year, reg_court, reg_number, subject, search_type, ins_court, scrape_html, store, html_format, compression, chunksize)
+    client = _client_session(workers, max_per_host) if session is None else session
+    try:
+        reply = None
+        while True:
+            step = await _send(steps, reply)
+            if step[0] == "stop":
+                return
+            reply = None
+            if step[0] == "get":
+                reply = (await _get_async(client, step[1], step[2]))[1]
+            elif step[0] == "fetch":
+                reply = await _fetch_html_async(client, step[1], workers, parse = step[2], validate = step[3])
+            else:
+                yield step[1]
+    finally:
+        _close(steps)
+        if session is None:
+            await client.close()
+
+async def insol_proc_scr_async(reg = "", state = "", date_from = "", date_to = "", name = "", domicile = "", department_number = "",
+                               register_reference = "", seq_number = "", year = "", reg_court = "", reg_number = "", subject = "",
+                               search_type = "", ins_court = "", scrape_html = True, workers = 1, max_per_host = 4, store = "",
+                               html_format = "repr", compression = "", session = None):
+    """
+ Scrapes insolvency proceedings information on alt.insolvenzbekanntmachungen.de like insol_proc_scr() without blocking 
+ the event loop, so that a single event loop may run many searches concurrently. Requests pass the rate limiter, 
+ retries and circuit breaker of set_rate_limit(). Cancelling the task cancels all of its pending requests.
+ 
+   Args:
+       workers (int): The maximum number of requests of the search in flight at a time
+       max_per_host (int): The maximum number of concurrent connections to the same host, unless a session is entered
+       session (aiohttp.ClientSession): (optional) A session shared by several searches, so that its connector limits 
+       the concurrent connections of all of them. A new session is created for the search if None
+       further arguments: See insol_proc_scr()
+  
+   Returns:
+       A Dataframe with the data columns of insol_proc_scr(), None if the search is rejected by the website
+    """
+    chunks = []
+    async for chunk in _insol_proc_scr_async(reg, state, date_from, date_to, name, domicile, department_number, register_reference,
+                                             seq_number, year, reg_court, reg_number, subject, search_type, ins_court, scrape_html,
+                                             workers, max_per_host, store, html_format, compression, 0, session):
+        if chunk is None:
+            return
+        chunks.append(chunk)
+    if len(chunks) == 0:
+        return pd.DataFrame()
+    return pd.concat(chunks)
+
+async def insol_proc_scr_async_iter(reg = "", state = "", date_from = "", date_to = "", name = "", domicile = "", department_number = "",
+                                    register_reference = "", seq_number = "", year = "", reg_court = "", reg_number = "", subject = "",
+                                    search_type = "", ins_court = "", scrape_html = True, workers = 1, max_per_host = 4, store = "",
+                                    html_format = "repr", compression = "", chunksize = 1000, session = None):
+    """
+ Scrapes insolvency proceedings like insol_proc_scr_async(), but yields the announcements in DataFrames of up to 
+ `chunksize` rows as an asynchronous generator. The next chunk is only scraped once the previous one is consumed.
+ 
+   Args:
+       chunksize (int): The maximum number of announcements per yielded DataFrame (0: one DataFrame per registry)
+       further arguments: See insol_proc_scr_async()
+  
+   Yields:
+       A Dataframe for each chunk with the data columns of insol_proc_scr()
+    """
+    async for chunk in _insol_proc_scr_async(reg, state, date_from, date_to, name, domicile, department_number, register_reference,
+                                             seq_number, year, reg_court, reg_number, subject, search_type, ins_court, scrape_html,
+                                             workers, max_per_host, store, html_format, compression, chunksize, session):
+        if chunk is None:
+            return
+        yield chunk
+
+async def insol_ann_state_summary_async(subject = "", date_from = "", date_to = "", workers = 8, max_per_host = 8, cache_file = "", index = "", session = None):
+    """
+ Returns the summary of insol_ann_state_summary() without blocking the event loop.
+ 
+   Args:
+       workers (int): The maximum number of search requests in flight at a time
+       max_per_host (int): The maximum number of concurrent connections to the same host, unless a session is entered
+       session (aiohttp.ClientSession): (optional) A session shared with other searches, a new session is created if None
+       further arguments: See insol_ann_state_summary()
+  
+   Returns:
+       A Dataframe with the data columns of insol_ann_state_summary()
+    """
+    if len(index) != 0:
+        with _stage("summary", rows = 0):
+            return await asyncio.to_thread(_index_state_summary, subject, date_from, date_to, index)
+    steps = _state_summary_steps(subject, date_from, date_to, cache_file)
+    client = _client_session(workers, max_per_host) if session is None else session
+    try:
+        step = await _send(steps, None)
+        while step[0] != "stop":
+            with _stage("summary", rows = len(step[1])):
+                results = await _fetch_html_async(client, step[1], workers, parse = step[2], validate = step[3])
+            step = await _send(steps, results)
+        return step[1]
+    finally:
+        _close(steps)
+        if session is None:
+            await client.close()
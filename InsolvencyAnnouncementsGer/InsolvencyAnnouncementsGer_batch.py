@@ -0,0 +1,142 @@
+import pandas as pd
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
+from .InsolvencyAnnouncementsGer import insol_proc_scrpar, _without_text_cache
+from .InsolvencyAnnouncementsGer_store import _connect, _columns, _select
+from .InsolvencyAnnouncementsGer_events import _print, _stage
+
+# Parsing adds the text and the content tags to each html page, a chunk in flight takes about this multiple of its 
+# decompressed html
+_expansion = 4
+
+def _ranges(store = "", chunk_bytes = 0):
+    '''Splits the store into consecutive rowid ranges of at most `chunk_bytes` of decompressed html, reading solely the 
+    sizes of the pages - or the stored lengths for pages of stores written before the sizes were recorded. Yields 
+    (first rowid, last rowid, number of announcements).'''
+    with closing(_connect(store)) as con:
+        first, last, size, rows = None, None, 0, 0
+        for rowid, length in con.execute("SELECT a.rowid, coalesce(p.size, length(coalesce(a.scraped_html, p.scraped_html))) "
+                                         "FROM announcements a LEFT JOIN pages p ON p.hash = a.content_hash ORDER BY a.rowid"):
+            if first is not None and size + (length or 0) > chunk_bytes:
+                yield first, last, rows
+                first, size, rows = None, 0, 0
+            if first is None:
+                first = rowid
+            last, size, rows = rowid, size + (length or 0), rows + 1
+        if first is not None:
+            yield first, last, rows
+
+def _parse_range(store, first, last, arguments):
+    '''Reads and parses the announcements of a rowid range, in a worker process. Returns the parsed DataFrame without the
+    html and the keys of the announcements which could not be parsed.'''
+    with closing(_connect(store)) as con:
+        df = pd.DataFrame(con.execute(_select + " WHERE a.rowid BETWEEN ? AND ? ORDER BY a.rowid", (first, last)).fetchall(), columns = _columns)
+    failed = []
+    # The text cache would hold texts beyond the memory budget of the chunks
+    with _without_text_cache():
+        try:
+            parsed = insol_proc_scrpar(df, **arguments)
+        except ValueError:
+            frames = []
+            for i in range(len(df)):
+                try:
+                    frames.append(insol_proc_scrpar(df.iloc[[i]].copy(), **arguments))
+                except ValueError:
+                    failed.append(df["key"].iloc[i])
+            parsed = pd.concat(frames) if len(frames) != 0 else df.iloc[0:0].copy()
+    return parsed.drop(columns = ["scraped_html"]).reset_index(drop = True), failed
+
+def insol_proc_scrpar_store_iter(store = "", memory = 512, processes = 1, convert_html_to_text = True, register_type = False, text_parser = "lxml"):
+    """
+ Parses the announcements of the local announcement store (see store_write()) out-of-core: the html is read from the
+ store in chunks bounded by the memory budget, parsed - optionally across worker processes - and yielded chunk by
+ chunk, so that archives larger than the memory can be parsed again, for example after a parser fix.
+
+   Args:
+       store (str): Path of the SQLite announcement store
+       memory (int): The approximate memory budget in MB of the chunks in flight, which are read, parsed and yielded
+       processes (int): The number of worker processes the chunks are parsed in (default: 1, in this process)
+       convert_html_to_text (bool): Shall the text be parsed?
+       register_type (bool): Shall the register_types be identified and returned?
+       text_parser (str): The parser used to convert the html to text, either {"lxml", "fast"}
+
+   Yields:
+       A Dataframe for each chunk with the data columns key, registry and scrape_date and the data columns of
+       insol_proc_scrpar(), without the html content, in the order of the store
+    """
+    processes = max(1, processes)
+    in_flight = processes + 1 if processes > 1 else 1
+    chunk_bytes = max(1, int(memory * 1024 * 1024) // (_expansion * in_flight))
+    arguments = {"convert_html_to_text": convert_html_to_text, "register_type": register_type, "text_parser": text_parser}
+    with closing(_connect(store)) as con:
+        total = con.execute("SELECT count(*) FROM announcements").fetchone()[0]
+    done, failed = 0, 0
+    executor = ProcessPoolExecutor(max_workers = processes) if processes > 1 else None
+    try:
+        pending = []
+        ranges = _ranges(store, chunk_bytes)
+        while True:
+            while len(pending) < in_flight:
+                chunk = next(ranges, None)
+                if chunk is None:
+                    break
+                if executor is None:
+                    pending.append((chunk, None))
+                else:
+                    pending.append((chunk, executor.submit(_parse_range, store, chunk[0], chunk[1], arguments)))
+            if len(pending) == 0:
+                break
+            chunk, future = pending.pop(0)
+            with _stage("batch", rows = chunk[2]):
+                df, keys = future.result() if future is not None else _parse_range(store, chunk[0], chunk[1], arguments)
+            done, failed = done + chunk[2], failed + len(keys)
+            if len(keys) != 0:
+                _print(len(keys), "announcements could not be parsed:", ", ".join(keys[:5]) + (", ..." if len(keys) > 5 else ""))
+            _print("Parsed", done, "of", total, "announcements of the store.")
+            yield df
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures = True)
+    if failed != 0:
+        _print(failed, "of", total, "announcements could not be parsed.")
+
+def insol_proc_scrpar_store(store = "", path = "", index = "", memory = 512, processes = 1, convert_html_to_text = True, register_type = False,
+                            text_parser = "lxml", partition = "month"):
+    """
+ Parses all announcements of the local announcement store out-of-core with insol_proc_scrpar_store_iter() and writes
+ the parsed chunks incrementally to a Parquet dataset (see insol_proc_to_parquet()) and/or the local index (see
+ index_write()), so that solely the chunks in flight are held in memory. Announcements already contained in the index 
+ are updated, so that the index reflects a parser fix.
+
+   Args:
+       store (str): Path of the SQLite announcement store
+       path (str): (optional) The directory of the Parquet dataset the parsed announcements are added to
+       index (str): (optional) Path of the SQLite index the parsed announcements are added to
+       memory (int): The approximate memory budget in MB of the chunks in flight
+       processes (int): The number of worker processes the chunks are parsed in
+       partition (str): The announcement period of the Parquet partitions, either {"day", "month", "year"}
+       register_type (bool): Shall the register_types be identified and returned? Always True if `index` is specified, 
+       as the daily counts of the index need them
+       further arguments: See insol_proc_scrpar()
+
+   Returns:
+       The number of parsed announcements (as `int`)
+    """
+    if len(path) == 0 and len(index) == 0:
+        raise ValueError("Either path or index needs to be specified.")
+    if len(path) != 0:
+        from .InsolvencyAnnouncementsGer_export import insol_proc_to_parquet
+    if len(index) != 0:
+        from .InsolvencyAnnouncementsGer_index import index_write
+        register_type = True
+    parsed = 0
+    for df in insol_proc_scrpar_store_iter(store, memory, processes, convert_html_to_text, register_type, text_parser):
+        if len(df) == 0:
+            continue
+        with _stage("store", rows = len(df)):
+            if len(path) != 0:
+                insol_proc_to_parquet(df, path, partition = partition)
+            if len(index) != 0:
+                index_write(df, index)
+        parsed += len(df)
+    return parsed
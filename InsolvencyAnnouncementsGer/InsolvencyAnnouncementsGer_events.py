@@ -0,0 +1,126 @@
+import time
+import threading
+from contextlib import contextmanager
+
+_listeners = []
+_quiet = False
+
+def set_instrumentation(listeners = None, quiet = False):
+    """
+ Registers the callbacks receiving the instrumentation events of all scraping and parsing functions and switches the 
+ console output on or off. Each callback is called as callback(event, fields) with one of the following events:
+            ==============  ==================================================================================================
+            request         each HTTP request: url, status (None on a connection error), bytes, seconds, attempt, error
+            retry           each retry of a failed request: url, attempt, delay, error
+            circuit_open    a request refused by the open circuit breaker: url
+            session         a fresh PHP SESSION ID fetched for stale or outdated URLs: session_id
+            stage           each completed stage: stage {"search", "listing", "detail", "store", "parse", "text", "summary", 
+                            "shard", "unit", "batch"}, seconds and, where applicable, registry and rows
+            registry        the totals of each scraped registry: registry, results, pages, entries, failed, reused
+            message         each progress message otherwise printed to the console: text
+            ==============  ==================================================================================================
+ The callbacks are called from the worker threads of the scraping functions and need to be thread-safe.
+ 
+   Args:
+       listeners (callable or list of callables): (optional) The callbacks, for example a ScrapeStats object, none if None
+       quiet (bool): Shall the progress messages not be printed to the console?
+    """
+    global _listeners, _quiet
+    if listeners is None:
+        listeners = []
+    elif callable(listeners):
+        listeners = [listeners]
+    _listeners = list(listeners)
+    _quiet = quiet
+
+def _emit(event, **fields):
+    for listener in _listeners:
+        listener(event, fields)
+
+def _print(*args):
+    '''Prints a progress message unless in quiet mode and emits it as "message" event.'''
+    if _listeners:
+        _emit("message", text = " ".join(str(arg) for arg in args))
+    if _quiet == False:
+        print(*args)
+
+@contextmanager
+def _stage(stage, **fields):
+    '''Emits the wall time of the enclosed code as "stage" event, fields set on the yielded dict are emitted with it.'''
+    start = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        if _listeners:
+            _emit("stage", stage = stage, seconds = time.perf_counter() - start, **fields)
+
+class ScrapeStats:
+    """
+ Collects the instrumentation events as statistics. Register it with set_instrumentation(ScrapeStats()) and read the 
+ statistics with report().
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latencies = []
+            self.statuses = {}
+            self.bytes = 0
+            self.errors = 0
+            self.retries = 0
+            self.refused = 0
+            self.stages = {}
+            self.registries = {}
+
+    def __call__(self, event, fields):
+        with self._lock:
+            if event == "request":
+                self.latencies.append(fields["seconds"])
+                self.statuses[fields["status"]] = self.statuses.get(fields["status"], 0) + 1
+                self.bytes += fields["bytes"]
+                self.errors += 1 if fields["error"] else 0
+            elif event == "retry":
+                self.retries += 1
+            elif event == "circuit_open":
+                self.refused += 1
+            elif event == "stage":
+                stage = self.stages.setdefault(fields["stage"], {"calls": 0, "seconds": 0.0, "rows": 0})
+                stage["calls"] += 1
+                stage["seconds"] += fields["seconds"]
+                stage["rows"] += fields.get("rows", 0)
+            elif event == "registry":
+                totals = self.registries.setdefault(fields["registry"], {})
+                for key, value in fields.items():
+                    if key != "registry":
+                        totals[key] = totals.get(key, 0) + value
+
+    def report(self):
+        """
+ Returns the collected statistics.
+ 
+   Returns:
+       A dict, keys are as follows: 
+            ==================  ====================================================================================
+            requests            the number of HTTP requests including retries (as `int`)
+            errors              the number of failed HTTP requests including retries (as `int`)
+            retries             the number of retries (as `int`)
+            refused             the number of requests refused by the open circuit breaker (as `int`)
+            status              the number of responses per HTTP status, None for connection errors (as `dict`)
+            bytes               the number of received bytes (as `int`)
+            latency             the mean, median, 95th percentile and maximum request latency in seconds (as `dict`)
+            stages              the calls, wall time in seconds and rows per stage (as `dict`)
+            registries          the results, pages, entries, failed and reused entries per registry (as `dict`)
+            ==================  ====================================================================================
+        """
+        with self._lock:
+            latencies = sorted(self.latencies)
+            latency = {}
+            if latencies:
+                latency = {"mean": sum(latencies) / len(latencies), "median": latencies[len(latencies) // 2],
+                           "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], "max": latencies[-1]}
+            return {"requests": len(latencies), "errors": self.errors, "retries": self.retries, "refused": self.refused,
+                    "status": dict(self.statuses), "bytes": self.bytes, "latency": latency,
+                    "stages": {stage: dict(values) for stage, values in self.stages.items()},
+                    "registries": {registry: dict(totals) for registry, totals in self.registries.items()}}
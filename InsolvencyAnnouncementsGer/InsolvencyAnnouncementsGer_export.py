@@ -0,0 +1,125 @@
+import os
+import re
+import uuid
+import pandas as pd
+from datetime import datetime
+from .InsolvencyAnnouncementsGer import _read_html
+
+_categorical_columns = ["state", "state_abbr", "insolvency_court", "insolvency_court_abbr", "registry", "subject",
+                        "registration_court", "register_type", "court_file_number_year"]
+
+_partition_formats = {"day": "%Y-%m-%d", "month": "%Y-%m", "year": "%Y"}
+
+_period_pattern = re.compile(r"period=([^/\\]+)")
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('The Parquet export requires the pyarrow package: pip install pyarrow')
+    return pyarrow
+
+def _typed(df):
+    '''Returns a copy of the parsed proceedings with categorical, date and time dtypes.'''
+    df = df.copy()
+    for column in _categorical_columns:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    if "date" in df.columns:
+        df["date"] = pd.to_datetime(df["date"], format = "%Y-%m-%d", errors = "coerce")
+    if "time" in df.columns:
+        df["time"] = pd.to_timedelta(df["time"], errors = "coerce")
+    if "scrape_date" in df.columns:
+        df["scrape_date"] = pd.to_datetime(df["scrape_date"].astype(str), errors = "coerce")
+    if "scraped_html" in df.columns:
+        df["scraped_html"] = df["scraped_html"].map(lambda x: _read_html(x) if isinstance(x, bytes) else x)
+    return df
+
+def _periods(files, date_from = "", date_to = ""):
+    '''Returns the period partitions of the dataset files which overlap the date range. A period - of the format of the
+    partition granularity the files were written with - is a prefix of the ISO dates it contains, so that it overlaps the 
+    range if it lies between the equally long prefixes of the bounds.'''
+    bounds = [datetime.strptime(value.strip(), "%d.%m.%Y").strftime("%Y-%m-%d") if value else None for value in (date_from, date_to)]
+    periods = set()
+    for file in files:
+        match = _period_pattern.search(file)
+        if match is None:
+            continue
+        period = match.group(1)
+        if period == "unknown":
+            continue
+        if (bounds[0] is None or period >= bounds[0][:len(period)]) and (bounds[1] is None or period <= bounds[1][:len(period)]):
+            periods.add(period)
+    return sorted(periods)
+
+def insol_proc_to_parquet(df, path = "", partition = "month", compression = "zstd"):
+    """
+ Writes parsed insolvency proceedings - the output of insol_proc_scrpar() or insol_proc_scrmeta() - to a Parquet 
+ dataset partitioned by announcement period and state (`path`/period=2020-10/state_abbr=be/...). Low-cardinality 
+ columns such as the courts, registry and subject are stored dictionary encoded and are loaded as pandas categoricals, 
+ the date and time as datetime64 and timedelta64. Repeated calls - for example for each chunk of 
+ insol_proc_scrpar_iter() - add new files to the dataset, the chunks have to share their data columns.
+ 
+   Args:
+       df (Dataframe): The dataframe as output of insol_proc_scrpar() or insol_proc_scrmeta()
+       path (str): The directory of the Parquet dataset, which is created if it does not exist
+       partition (str): The announcement period of the partitions, either {"day", "month", "year"}
+       compression (str): The Parquet compression codec, for example {"zstd", "snappy", "gzip", "none"}
+  
+   Returns:
+       The number of written proceedings (as `int`)
+    """
+    if partition not in _partition_formats:
+        raise ValueError('partition needs to be either "day", "month" or "year".')
+    pa = _pyarrow()
+    df = _typed(df.assign(state_abbr = df["state_abbr"].fillna("unknown")))
+    df["period"] = df["date"].dt.strftime(_partition_formats[partition]).fillna("unknown")
+    table = pa.Table.from_pandas(df, preserve_index = False)
+    os.makedirs(path, exist_ok = True)
+    pa.dataset.write_dataset(table, path, format = "parquet",
+                             partitioning = pa.dataset.partitioning(pa.schema([("period", pa.string()), ("state_abbr", pa.string())]), flavor = "hive"),
+                             basename_template = "part-" + uuid.uuid4().hex + "-{i}.parquet",
+                             file_options = pa.dataset.ParquetFileFormat().make_write_options(compression = compression),
+                             existing_data_behavior = "overwrite_or_ignore")
+    return len(df)
+
+def insol_proc_read_parquet(path = "", columns = None, date_from = "", date_to = "", states = None):
+    """
+ Loads parsed insolvency proceedings from a Parquet dataset written by insol_proc_to_parquet(). Solely the requested 
+ columns are read and partitions outside the date range or states are skipped without being opened.
+ 
+   Args:
+       path (str): The directory of the Parquet dataset
+       columns (list of str): (optional) The data columns to load, all columns if None
+       date_from (str): (optional) DD.MM.YYYY
+       date_to (str): (optional) DD.MM.YYYY
+       states (list of str): (optional) The state abbreviations to load, for example ["be", "by"]
+  
+   Returns:
+       A Dataframe with the requested data columns of insol_proc_scrpar()
+    """
+    pa = _pyarrow()
+    dataset = pa.dataset.dataset(path, format = "parquet", partitioning = "hive")
+    condition = None
+    for column, operator, value in [("date", "ge", date_from), ("date", "le", date_to)]:
+        if value:
+            day = pa.scalar(datetime.strptime(value.strip(), "%d.%m.%Y"), dataset.schema.field("date").type)
+            term = pa.dataset.field(column) >= day if operator == "ge" else pa.dataset.field(column) <= day
+            condition = term if condition is None else condition & term
+    if (date_from or date_to) and "period" in dataset.schema.names:
+        periods = pa.array(_periods(dataset.files, date_from, date_to), pa.string()).cast(dataset.schema.field("period").type)
+        term = pa.dataset.field("period").isin(periods)
+        condition = term if condition is None else condition & term
+    if states:
+        term = pa.dataset.field("state_abbr").isin(list(states))
+        condition = term if condition is None else condition & term
+    if columns is None:
+        columns = [name for name in dataset.schema.names if name != "period"]
+    table = dataset.to_table(columns = list(columns), filter = condition)
+    df = table.to_pandas()
+    for column in _categorical_columns:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+    return df
@@ -0,0 +1,310 @@
+import sqlite3
+import re
+import pandas as pd
+from contextlib import closing
+from datetime import datetime
+from .InsolvencyAnnouncementsGer_store import announcement_key
+from .InsolvencyAnnouncementsGer_constants import _registers
+
+_columns = ["key", "url", "date", "time", "state_abbr", "insolvency_court", "insolvency_court_abbr", "court_file_number",
+            "court_file_number_year", "name_debtor", "domicile_debtor", "subject", "registration_court", "register_type", "register_number"]
+
+_stage_columns = ["proceeding", "insolvency_court_abbr", "court_file_number", "court_file_number_year", "first_date", "last_date",
+                  "last_time", "announcements", "stage"]
+
+_schema = ["""CREATE TABLE IF NOT EXISTS proceedings (
+                  key TEXT PRIMARY KEY, url TEXT, date TEXT, time TEXT, state_abbr TEXT, insolvency_court TEXT,
+                  insolvency_court_abbr TEXT, court_file_number TEXT, court_file_number_year TEXT, name_debtor TEXT,
+                  domicile_debtor TEXT, subject TEXT, registration_court TEXT, register_type TEXT, register_number TEXT,
+                  court_file_key TEXT, register_key TEXT, proceeding TEXT, scraped_text TEXT, counted INTEGER)""",
+           "CREATE INDEX IF NOT EXISTS proceedings_court_file ON proceedings (court_file_key)",
+           "CREATE INDEX IF NOT EXISTS proceedings_register ON proceedings (register_key)",
+           "CREATE INDEX IF NOT EXISTS proceedings_timeline ON proceedings (proceeding, date, time)",
+           """CREATE TABLE IF NOT EXISTS proceeding_stages (
+                  proceeding TEXT PRIMARY KEY, insolvency_court_abbr TEXT, court_file_number TEXT, court_file_number_year TEXT,
+                  first_date TEXT, last_date TEXT, last_time TEXT, announcements INTEGER, stage TEXT)""",
+           "CREATE INDEX IF NOT EXISTS proceeding_stages_stage ON proceeding_stages (stage)",
+           """CREATE TABLE IF NOT EXISTS daily_counts (
+                  date TEXT, state_abbr TEXT, register_type TEXT, subject TEXT, announcements INTEGER,
+                  PRIMARY KEY (date, state_abbr, register_type, subject))""",
+           """CREATE VIRTUAL TABLE IF NOT EXISTS proceedings_text USING fts5 (name_debtor, domicile_debtor, scraped_text,
+                  content = 'proceedings', content_rowid = 'rowid', tokenize = "unicode61 remove_diacritics 0")""",
+           "CREATE VIRTUAL TABLE IF NOT EXISTS proceedings_terms USING fts5vocab (proceedings_text, row)"]
+
+_word_pattern = re.compile(r'(?:[^\W_]|[?*])+')
+
+def _connect(index):
+    con = sqlite3.connect(index)
+    try:
+        for statement in _schema:
+            con.execute(statement)
+    except sqlite3.OperationalError as e:
+        con.close()
+        raise ImportError('The local index requires an SQLite library with the FTS5 extension: ' + str(e))
+    if "counted" not in [row[1] for row in con.execute("PRAGMA table_info(proceedings)")]:
+        con.close()
+        raise ValueError('The index ' + index + ' was created by an earlier version, please write it anew with index_write().')
+    return con
+
+def _exact_key(value):
+    '''Normalizes court file and register numbers, so that "12 IN 345/20" and "12IN345/20" are the same key.'''
+    if value is None or value != value:
+        return None
+    return re.sub(r'\s+', '', str(value)).upper()
+
+def _text(value):
+    return "" if value is None or value != value else str(value)
+
+def _proceeding_key(insolvency_court_abbr = "", court_file_number = "", court_file_number_year = ""):
+    '''Returns the key of the proceeding an announcement belongs to: court, court file number and year of the proceeding.'''
+    court_file_key = _exact_key(court_file_number)
+    if not insolvency_court_abbr or not court_file_key:
+        return None
+    return "|".join([str(insolvency_court_abbr).lower(), court_file_key, _text(court_file_number_year)])
+
+_stage_upsert = """INSERT INTO proceeding_stages VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?)
+                     ON CONFLICT (proceeding) DO UPDATE SET
+                         first_date = min(first_date, excluded.first_date),
+                         stage = CASE WHEN excluded.last_date || excluded.last_time >= last_date || last_time THEN excluded.stage ELSE stage END,
+                         last_time = CASE WHEN excluded.last_date || excluded.last_time >= last_date || last_time THEN excluded.last_time ELSE last_time END,
+                         last_date = max(last_date, excluded.last_date),
+                         announcements = announcements + 1"""
+
+_count_upsert = """INSERT INTO daily_counts VALUES (?, ?, ?, ?, 1)
+                     ON CONFLICT (date, state_abbr, register_type, subject) DO UPDATE SET announcements = announcements + 1"""
+
+_count_remove = """UPDATE daily_counts SET announcements = announcements - 1
+                     WHERE date = ? AND state_abbr = ? AND register_type = ? AND subject = ?"""
+
+_text_columns = ["name_debtor", "domicile_debtor", "scraped_text"]
+
+def _count(row):
+    return (row["date"], row["state_abbr"], row["register_type"] if row["register_type"] in _registers else "", row["subject"])
+
+def _restage(con, proceeding):
+    '''Recomputes the stage of a proceeding from its announcements, after one of them was replaced.'''
+    if proceeding is None:
+        return
+    announcements, first_date = con.execute("SELECT count(*), min(date) FROM proceedings WHERE proceeding = ?", (proceeding,)).fetchone()
+    if announcements == 0:
+        con.execute("DELETE FROM proceeding_stages WHERE proceeding = ?", (proceeding,))
+        return
+    latest = con.execute("SELECT insolvency_court_abbr, court_file_number, court_file_number_year, date, time, subject FROM proceedings "
+                         "WHERE proceeding = ? ORDER BY date DESC, time DESC, rowid DESC LIMIT 1", (proceeding,)).fetchone()
+    con.execute("INSERT OR REPLACE INTO proceeding_stages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (proceeding,) + latest[:3] + (first_date,) + latest[3:5] + (announcements, latest[5]))
+
+def index_write(df, index = ""):
+    """
+ Adds parsed insolvency proceedings - the output of insol_proc_scrpar() or insol_proc_scrmeta() - to the local index. 
+ The names, domiciles and texts of the announcements are added to a full-text index, the court file numbers and 
+ register numbers to exact-key indexes. Announcements already contained in the index are updated with the non-empty 
+ fields of `df`, for example when the output of insol_proc_scrmeta() is followed by the one of insol_proc_scrpar() or 
+ the announcements are parsed again after a parser fix. The announcements are 
+ grouped by proceeding - insolvency court, court file number and year -, whose timeline and current stage are 
+ updated with each new announcement, see index_proceeding(). The daily numbers of announcements by state, register 
+ type and subject are counted for insol_ann_state_summary(index = ...). Solely announcements with subject and register 
+ type - the output of insol_proc_scrpar(register_type = True) - are counted, the others until they are written again 
+ with them.
+ 
+   Args:
+       df (Dataframe): The dataframe as output of insol_proc_scrpar() or insol_proc_scrmeta()
+       index (str): Path of the SQLite index, which is created if it does not exist
+  
+   Returns:
+       The number of newly indexed and updated announcements (as `int`)
+    """
+    fields = _columns[1:] + ["scraped_text"]
+    rows = [{column: _text(row.get(column)) for column in fields} for row in df.to_dict("records")]
+    # Solely announcements with subject and register type are counted, the others would be counted as "Other"
+    typed = "register_type" in df.columns
+    written = 0
+    with closing(_connect(index)) as con:
+        with con:
+            for row in rows:
+                key = announcement_key(row["url"])
+                if key is None:
+                    continue
+                old = con.execute("SELECT rowid, " + ", ".join(fields) + ", proceeding, counted FROM proceedings WHERE key = ?", (key,)).fetchone()
+                counted = typed
+                if old is not None:
+                    rowid, old_proceeding, old_counted, old = old[0], old[-2], old[-1] == 1, dict(zip(fields, old[1:-2]))
+                    row = dict({column: row[column] or old[column] for column in fields},
+                               register_type = row["register_type"] if typed else old["register_type"])
+                    counted = typed or old_counted
+                counted = counted and len(row["subject"]) != 0
+                if old is not None and row == old and counted == old_counted:
+                    continue
+                proceeding = _proceeding_key(row["insolvency_court_abbr"], row["court_file_number"], row["court_file_number_year"])
+                values = [row[column] for column in fields] + [_exact_key(row["court_file_number"]), _exact_key(row["register_number"]), proceeding,
+                                                               int(counted)]
+                if old is None:
+                    rowid = con.execute("INSERT INTO proceedings (key, " + ", ".join(fields) + ", court_file_key, register_key, proceeding, counted) "
+                                        "VALUES (" + ",".join("?" * (len(values) + 1)) + ")", [key] + values).lastrowid
+                    if proceeding is not None:
+                        con.execute(_stage_upsert, (proceeding, row["insolvency_court_abbr"], row["court_file_number"], row["court_file_number_year"],
+                                                    row["date"], row["date"], row["time"], row["subject"]))
+                else:
+                    con.execute("INSERT INTO proceedings_text (proceedings_text, rowid, " + ", ".join(_text_columns) + ") VALUES ('delete', ?, ?, ?, ?)",
+                                [rowid] + [old[column] for column in _text_columns])
+                    con.execute("UPDATE proceedings SET " + ", ".join(column + " = ?" for column in fields + ["court_file_key", "register_key", "proceeding", "counted"]) +
+                                " WHERE rowid = ?", values + [rowid])
+                    if old_counted:
+                        con.execute(_count_remove, _count(old))
+                    for stale in {old_proceeding, proceeding}:
+                        _restage(con, stale)
+                if counted:
+                    con.execute(_count_upsert, _count(row))
+                con.execute("INSERT INTO proceedings_text (rowid, " + ", ".join(_text_columns) + ") VALUES (?, ?, ?, ?)",
+                            [rowid] + [row[column] for column in _text_columns])
+                written += 1
+    return written
+
+def _match(con, column, query):
+    '''Translates a query with the wildcards of the portal - ? for a single character and * for any number of characters - 
+    into an FTS5 expression on `column`, each word of the query has to occur in the column. Returns None if a word 
+    occurs nowhere.'''
+    terms = []
+    for word in _word_pattern.findall(query.lower()):
+        if word.strip("*") == "":
+            continue
+        if "?" not in word and "*" not in word:
+            terms.append('"' + word + '"')
+        elif "?" not in word and "*" not in word.rstrip("*"):
+            terms.append('"' + word.rstrip("*") + '" *')
+        else:
+            expansion = [row[0] for row in con.execute("SELECT term FROM proceedings_terms WHERE term GLOB ?", (word,))]
+            if len(expansion) == 0:
+                return None
+            terms.append("(" + " OR ".join('"' + term + '"' for term in expansion) + ")")
+    return " AND ".join(column + " : " + term for term in terms)
+
+def index_search(index = "", name = "", domicile = "", text = "", court_file_number = "", register_number = "", limit = None):
+    """
+ Searches the local index for announcements. The name, domicile and text queries support the wildcards of the 
+ portal: a question mark ? serves as a placeholder for a single character and an asterisk * for no or any number of 
+ characters. Each word of a query has to occur in the respective field, case-insensitive. Court file numbers and 
+ register numbers are matched exactly, regardless of whitespace. All entered criteria have to be met.
+ 
+   Args:
+       index (str): Path of the SQLite index
+       name (str): (optional) Name or firm name of the debtor, for example "M?ller*"
+       domicile (str): (optional) Domicile of the debtor
+       text (str): (optional) Words of the announcement text
+       court_file_number (str): (optional) The court file number, for example "12 IN 345/20"
+       register_number (str): (optional) The register number without the register type
+       limit (int): (optional) The maximum number of returned announcements
+  
+   Returns:
+       A Dataframe with the data columns key, url, date, time, state_abbr, insolvency_court, insolvency_court_abbr, 
+       court_file_number, court_file_number_year, name_debtor, domicile_debtor, subject, registration_court, 
+       register_type and register_number, ordered by date and time
+    """
+    with closing(_connect(index)) as con:
+        conditions, parameters = [], []
+        expressions = [_match(con, column, query) for column, query in
+                       [("name_debtor", name), ("domicile_debtor", domicile), ("scraped_text", text)] if len(query.strip()) != 0]
+        if None in expressions:
+            return pd.DataFrame(columns = _columns)
+        expressions = [expression for expression in expressions if len(expression) != 0]
+        if len(expressions) != 0:
+            conditions.append("rowid IN (SELECT rowid FROM proceedings_text WHERE proceedings_text MATCH ?)")
+            parameters.append(" AND ".join(expressions))
+        for column, value in [("court_file_key", court_file_number), ("register_key", register_number)]:
+            if len(value.strip()) != 0:
+                conditions.append(column + " = ?")
+                parameters.append(_exact_key(value))
+        query = "SELECT " + ", ".join(_columns) + " FROM proceedings"
+        if len(conditions) != 0:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY date, time"
+        if limit is not None:
+            query += " LIMIT " + str(int(limit))
+        return pd.DataFrame(con.execute(query, parameters).fetchall(), columns = _columns)
+
+def index_proceeding(index = "", insolvency_court_abbr = "", court_file_number = "", court_file_number_year = ""):
+    """
+ Looks up a proceeding in the local index: its current stage - the subject of its latest announcement - and the 
+ timeline of all its announcements. A proceeding is identified by the insolvency court, the court file number and 
+ the year the proceeding was initiated, as output by insol_proc_scrpar().
+ 
+   Args:
+       index (str): Path of the SQLite index
+       insolvency_court_abbr (str): The insolvency court abbreviation, for example "d2601"
+       court_file_number (str): The court file number, for example "12 IN 345/20", matched regardless of whitespace
+       court_file_number_year (str): (optional) The last two digits of the year the proceeding was initiated, 
+       by default taken from the court file number
+  
+   Returns:
+       A dict with the keys proceeding, insolvency_court_abbr, court_file_number, court_file_number_year, 
+       first_date, last_date, last_time, announcements, stage and timeline - a Dataframe with the data columns of 
+       index_search(), ordered by date and time - or None if the proceeding is not contained in the index
+    """
+    if len(court_file_number_year) == 0:
+        court_file_number_year = str(court_file_number).rsplit("/", 1)[-1].strip() if "/" in str(court_file_number) else ""
+    proceeding = _proceeding_key(insolvency_court_abbr, court_file_number, court_file_number_year)
+    if proceeding is None:
+        raise ValueError("insolvency_court_abbr and court_file_number are required")
+    with closing(_connect(index)) as con:
+        row = con.execute("SELECT " + ", ".join(_stage_columns) + " FROM proceeding_stages WHERE proceeding = ?", (proceeding,)).fetchone()
+        if row is None:
+            return None
+        result = dict(zip(_stage_columns, row))
+        result["timeline"] = pd.DataFrame(con.execute("SELECT " + ", ".join(_columns) + " FROM proceedings WHERE proceeding = ? "
+                                                      "ORDER BY date, time", (proceeding,)).fetchall(), columns = _columns)
+    return result
+
+def index_stages(index = "", stage = "", insolvency_court_abbr = "", limit = None):
+    """
+ Lists the proceedings contained in the local index with their current stage - the subject of their latest announcement.
+ 
+   Args:
+       index (str): Path of the SQLite index
+       stage (str): (optional) Only proceedings currently in this stage, for example "Eröffnungen"
+       insolvency_court_abbr (str): (optional) Only proceedings of this insolvency court
+       limit (int): (optional) The maximum number of returned proceedings
+  
+   Returns:
+       A Dataframe with the data columns proceeding, insolvency_court_abbr, court_file_number, court_file_number_year, 
+       first_date, last_date, last_time, announcements and stage, ordered by the date of the latest announcement
+    """
+    conditions, parameters = [], []
+    for column, value in [("stage", stage), ("insolvency_court_abbr", insolvency_court_abbr)]:
+        if len(value) != 0:
+            conditions.append(column + " = ?")
+            parameters.append(value)
+    query = "SELECT " + ", ".join(_stage_columns) + " FROM proceeding_stages"
+    if len(conditions) != 0:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY last_date, last_time"
+    if limit is not None:
+        query += " LIMIT " + str(int(limit))
+    with closing(_connect(index)) as con:
+        return pd.DataFrame(con.execute(query, parameters).fetchall(), columns = _stage_columns)
+
+def _iso_date(value = ""):
+    try:
+        return datetime.strptime(value.strip(), "%d.%m.%Y").strftime("%Y-%m-%d")
+    except ValueError:
+        raise ValueError("Dates have to be entered as DD.MM.YYYY: " + value)
+
+def _daily_counts(index = "", subject = "", date_from = "", date_to = ""):
+    '''Sums the materialized daily counts of the local index over the date range by state and register type. Returns a 
+    dict of (state_abbr, register_type) to the number of announcements, register type "" counting the announcements 
+    without one of the registers.'''
+    conditions, parameters = [], []
+    if len(date_from.strip()) != 0:
+        conditions.append("date >= ?")
+        parameters.append(_iso_date(date_from))
+    if len(date_to.strip()) != 0:
+        conditions.append("date <= ?")
+        parameters.append(_iso_date(date_to))
+    if len(subject.strip()) != 0:
+        conditions.append("(subject = ? OR subject LIKE ? || ' %')")
+        parameters += [subject.strip(), subject.strip()]
+    query = "SELECT state_abbr, register_type, sum(announcements) FROM daily_counts"
+    if len(conditions) != 0:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " GROUP BY state_abbr, register_type"
+    with closing(_connect(index)) as con:
+        return {(state_abbr, register_type): count for state_abbr, register_type, count in con.execute(query, parameters)}
@@ -0,0 +1,109 @@
+import os
+import re
+import json
+import threading
+import pandas as pd
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from .InsolvencyAnnouncementsGer import _insol_proc_scr_strict
+from .InsolvencyAnnouncementsGer_events import _print, _stage
+
+def _date_windows(date_from = "", date_to = "", shard_days = 1):
+    '''Splits the date range DD.MM.YYYY - DD.MM.YYYY into windows of `shard_days` days.'''
+    start = datetime.strptime(date_from.strip(), "%d.%m.%Y").date()
+    end = datetime.strptime(date_to.strip(), "%d.%m.%Y").date()
+    if end < start:
+        raise ValueError("date_to needs to be later than date_from.")
+    windows = []
+    while start <= end:
+        stop = min(start + timedelta(days = shard_days - 1), end)
+        windows.append((start.strftime("%d.%m.%Y"), stop.strftime("%d.%m.%Y")))
+        start = stop + timedelta(days = 1)
+    return windows
+
+def _shards(date_from = "", date_to = "", shard_days = 1, states = None, reg = None, subjects = None):
+    '''Returns the shards of the state x registry x subject x date window dimensions as dict {shard id: search arguments}.'''
+    shards = {}
+    for state in states or [""]:
+        for r in reg or [""]:
+            for subject in subjects or [None]:
+                for window_from, window_to in _date_windows(date_from, date_to, shard_days):
+                    shard = {"state": state, "reg": r, "date_from": window_from, "date_to": window_to}
+                    parts = [window_from, window_to, state or "all", r or "all"]
+                    if subject is not None:
+                        shard["subject"] = subject
+                        parts.append(subject or "all")
+                    shard_id = re.sub('[^0-9A-Za-z.-]+', '_', "_".join(parts))
+                    shards[shard_id] = shard
+    return shards
+
+def _write_manifest(path, manifest):
+    with open(path + ".tmp", "w", encoding = "utf-8") as f:
+        json.dump(manifest, f, ensure_ascii = False, indent = 1)
+    os.replace(path + ".tmp", path)
+
+def insol_proc_scr_job(directory = "", date_from = "", date_to = "", shard_days = 1, states = None, reg = None, shard_workers = 2, **kwargs):
+    """
+ Runs a long search of insol_proc_scr() as a resumable job. The date range - and optionally the states and registries - 
+ are split into shards, which are scraped in parallel. The result of each shard is saved to `directory` as soon as it 
+ is completed and recorded in the checkpoint manifest `directory`/manifest.json. A shard of which a search page or 
+ announcement could not be scraped is recorded as failed. A restarted job with the same arguments skips the completed 
+ shards and solely scrapes the incomplete ones.
+ 
+   Args:
+       directory (str): The job directory holding the manifest and the results of the shards
+       date_from (str): DD.MM.YYYY
+       date_to (str): DD.MM.YYYY
+       shard_days (int): The number of days of each shard
+       states (list of str): (optional) The German states each scraped as separate shard, all states at once if None
+       reg (list of str): (optional) The register types each scraped as separate shard, all register types at once if None
+       shard_workers (int): The number of shards scraped in parallel
+       **kwargs: Further arguments of insol_proc_scr(), for example search_type, subject, scrape_html or workers
+  
+   Returns:
+       A Dataframe with the data columns of insol_proc_scr() containing the results of all completed shards
+    """
+    os.makedirs(directory, exist_ok = True)
+    path = os.path.join(directory, "manifest.json")
+    shards = _shards(date_from, date_to, shard_days, states, reg)
+    arguments = dict(kwargs)
+    manifest = {"arguments": arguments, "shards": {}}
+    if os.path.exists(path):
+        with open(path, encoding = "utf-8") as f:
+            manifest = json.load(f)
+        if manifest["arguments"] != json.loads(json.dumps(arguments)):
+            raise ValueError("The job directory " + directory + " belongs to a job with different arguments.")
+    for shard_id, shard in shards.items():
+        manifest["shards"].setdefault(shard_id, dict(shard, status = "pending"))
+    _write_manifest(path, manifest)
+    
+    pending = [shard_id for shard_id in shards if manifest["shards"][shard_id]["status"] != "done"]
+    _print("Job", directory, ":", len(shards) - len(pending), "of", len(shards), "shards completed,", len(pending), "remaining.")
+    lock = threading.Lock()
+    def _run(shard_id):
+        with _stage("shard", shard = shard_id) as fields:
+            try:
+                df = _insol_proc_scr_strict(**shards[shard_id], **kwargs)
+                if df is None:
+                    raise ValueError("The search was rejected by the website.")
+                df.to_pickle(os.path.join(directory, shard_id + ".pkl"))
+                status = {"status": "done", "rows": len(df)}
+                fields["rows"] = len(df)
+            except Exception as e:
+                status = {"status": "failed", "error": str(e)}
+        with lock:
+            if status["status"] == "done":
+                manifest["shards"][shard_id].pop("error", None)
+            manifest["shards"][shard_id].update(status)
+            _write_manifest(path, manifest)
+        _print("Shard", shard_id, ":", status["status"])
+    with ThreadPoolExecutor(max_workers = max(1, shard_workers)) as executor:
+        list(executor.map(_run, pending))
+    
+    failed = [shard_id for shard_id in shards if manifest["shards"][shard_id]["status"] != "done"]
+    if len(failed) != 0:
+        _print(len(failed), "shards failed. Run the job again to resume them.")
+    frames = [pd.read_pickle(os.path.join(directory, shard_id + ".pkl")) for shard_id in shards if shard_id not in failed]
+    if len(frames) == 0:
+        return pd.DataFrame()
+    return pd.concat(frames)
@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+import pandas as pd
+from contextlib import closing
+from .InsolvencyAnnouncementsGer import _insol_proc_scr_strict, insol_proc_scrpar, insol_proc_scrmeta
+from .InsolvencyAnnouncementsGer_jobs import _shards
+from .InsolvencyAnnouncementsGer_events import _print, _stage
+
+_schema = """CREATE TABLE IF NOT EXISTS units (
+                 id TEXT PRIMARY KEY,
+                 arguments TEXT,
+                 status TEXT,
+                 worker TEXT,
+                 token TEXT,
+                 lease_until REAL,
+                 attempts INTEGER,
+                 rows INTEGER,
+                 error TEXT,
+                 updated REAL)"""
+
+class SQLiteQueue:
+    """
+ The default work queue of queue_put() and queue_work(), kept in a local SQLite file which all worker processes of 
+ a machine - or of several machines sharing a file system with working file locks - open. Units are claimed with a 
+ lease, units whose lease expires without being renewed - for example of a crashed worker - are claimed anew.
+ 
+ Other queue backends implement the same methods put(), claim(), renew(), complete(), fail() and units().
+    """
+    def __init__(self, path = ""):
+        self.path = path
+        with closing(self._connect()) as con:
+            con.execute(_schema)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout = 60, isolation_level = None)
+
+    def put(self, units):
+        '''Adds the units {unit id: arguments} not contained yet and returns the number of added units.'''
+        now = time.time()
+        with closing(self._connect()) as con:
+            con.execute("BEGIN IMMEDIATE")
+            added = sum(con.execute("INSERT OR IGNORE INTO units VALUES (?, ?, 'pending', NULL, NULL, NULL, 0, NULL, NULL, ?)",
+                                    (unit_id, json.dumps(arguments, ensure_ascii = False), now)).rowcount for unit_id, arguments in units.items())
+            con.execute("COMMIT")
+        return added
+
+    def claim(self, worker = "", lease = 600, max_attempts = 3):
+        '''Leases the next pending or expired unit to `worker` for `lease` seconds. Returns (unit id, arguments, lease token), 
+        None if no unit is available. Expired units which reached `max_attempts` are marked as failed instead.'''
+        now = time.time()
+        with closing(self._connect()) as con:
+            con.execute("BEGIN IMMEDIATE")
+            con.execute("UPDATE units SET status = 'failed', error = 'lease expired', updated = ? "
+                        "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?", (now, now, max_attempts))
+            row = con.execute("SELECT id, arguments FROM units WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?) "
+                              "ORDER BY id LIMIT 1", (now,)).fetchone()
+            if row is None:
+                con.execute("COMMIT")
+                return None
+            token = uuid.uuid4().hex
+            con.execute("UPDATE units SET status = 'leased', worker = ?, token = ?, lease_until = ?, attempts = attempts + 1, updated = ? "
+                        "WHERE id = ?", (worker, token, now + lease, now, row[0]))
+            con.execute("COMMIT")
+        return row[0], json.loads(row[1]), token
+
+    def _update(self, query, parameters):
+        with closing(self._connect()) as con:
+            return con.execute(query, parameters).rowcount == 1
+
+    def renew(self, unit_id, token, lease = 600):
+        '''Extends the lease of a unit, returns False if the lease was lost to another worker.'''
+        return self._update("UPDATE units SET lease_until = ?, updated = ? WHERE id = ? AND token = ? AND status = 'leased'",
+                            (time.time() + lease, time.time(), unit_id, token))
+
+    def complete(self, unit_id, token, rows = 0):
+        '''Marks a leased unit as done, returns False if the lease was lost to another worker.'''
+        return self._update("UPDATE units SET status = 'done', rows = ?, error = NULL, updated = ? WHERE id = ? AND token = ? AND status = 'leased'",
+                            (rows, time.time(), unit_id, token))
+
+    def fail(self, unit_id, token, error = "", max_attempts = 3):
+        '''Returns a leased unit to the queue, or marks it as failed once it reached `max_attempts`.'''
+        return self._update("UPDATE units SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, error = ?, "
+                            "updated = ? WHERE id = ? AND token = ? AND status = 'leased'", (max_attempts, error, time.time(), unit_id, token))
+
+    def units(self):
+        '''Returns all units as DataFrame with the columns id, arguments, status, worker, attempts, rows and error.'''
+        with closing(self._connect()) as con:
+            rows = con.execute("SELECT id, arguments, status, worker, attempts, rows, error FROM units ORDER BY id").fetchall()
+        return pd.DataFrame(rows, columns = ["id", "arguments", "status", "worker", "attempts", "rows", "error"])
+
+def _queue(queue):
+    return SQLiteQueue(queue) if isinstance(queue, str) else queue
+
+def queue_put(queue = "", date_from = "", date_to = "", shard_days = 1, states = None, reg = None, subjects = None, **kwargs):
+    """
+ Splits a search of insol_proc_scr() into units of work - one per state, registry, subject and date window - and adds 
+ them to a work queue, from which any number of worker processes started with queue_work() claim them. Units already 
+ contained in the queue are not added again, so the coordinator may be run repeatedly.
+ 
+   Args:
+       queue (str or queue object): Path of the SQLite work queue, or a queue object implementing the methods of SQLiteQueue
+       date_from (str): DD.MM.YYYY
+       date_to (str): DD.MM.YYYY
+       shard_days (int): The number of days of each unit
+       states (list of str): (optional) The German states each queued as separate units, all states at once if None
+       reg (list of str): (optional) The register types each queued as separate units, all register types at once if None
+       subjects (list of str): (optional) The subjects each queued as separate units, all subjects at once if None
+       **kwargs: Further arguments of insol_proc_scr() used for all units, for example search_type or scrape_html
+  
+   Returns:
+       The number of added units (as `int`)
+    """
+    units = {unit_id: dict(shard, **kwargs) for unit_id, shard in _shards(date_from, date_to, shard_days, states, reg, subjects).items()}
+    return _queue(queue).put(units)
+
+def _renew(queue, unit_id, token, lease, stop):
+    while stop.wait(lease / 3) == False:
+        if queue.renew(unit_id, token, lease) == False:
+            return
+
+def queue_work(queue = "", directory = "", worker = "", lease = 600, max_attempts = 3, max_units = 0, wait = 0,
+               parse = True, text_parser = "lxml"):
+    """
+ Runs a worker of a work queue filled by queue_put(). The worker claims one unit after another, scrapes it with 
+ insol_proc_scr(), parses it with insol_proc_scrpar() - or insol_proc_scrmeta() for units without html - and saves the 
+ result to `directory`/<unit id>.pkl. The lease of a unit is renewed while it is worked on, units of crashed workers 
+ are claimed anew once their lease expired. Failed units - including units of which a search page or announcement 
+ could not be scraped - are retried up to `max_attempts` times.
+ 
+   Args:
+       queue (str or queue object): Path of the SQLite work queue, or a queue object implementing the methods of SQLiteQueue
+       directory (str): The directory the results are saved to, shared by all workers
+       worker (str): (optional) The name of the worker, host name and process id if empty
+       lease (float): The number of seconds a claimed unit is leased to the worker before it may be claimed anew
+       max_attempts (int): The number of attempts of a unit before it is marked as failed
+       max_units (int): The maximum number of units worked on (default: 0, until the queue is empty)
+       wait (float): The number of seconds the worker keeps polling an empty queue for new units (default: 0, stop)
+       parse (bool): Shall the scraped announcements be parsed?
+       text_parser (str): The parser used to convert the html to text, either {"lxml", "fast"}
+  
+   Returns:
+       The number of units completed by the worker (as `int`)
+    """
+    queue = _queue(queue)
+    worker = worker or socket.gethostname() + "-" + str(os.getpid())
+    os.makedirs(directory, exist_ok = True)
+    completed = 0
+    idle_since = time.monotonic()
+    while max_units <= 0 or completed < max_units:
+        unit = queue.claim(worker, lease, max_attempts)
+        if unit is None:
+            if time.monotonic() - idle_since >= wait:
+                break
+            time.sleep(min(5, max(0.1, wait / 10)))
+            continue
+        unit_id, arguments, token = unit
+        stop = threading.Event()
+        threading.Thread(target = _renew, args = (queue, unit_id, token, lease, stop), daemon = True).start()
+        try:
+            with _stage("unit", unit = unit_id) as fields:
+                df = _insol_proc_scr_strict(**arguments)
+                if df is None:
+                    raise ValueError("The search was rejected by the website.")
+                if parse and len(df) != 0:
+                    df = df.reset_index(drop = True)
+                    if "scraped_html" in df.columns:
+                        df = insol_proc_scrpar(df, text_parser = text_parser)
+                    else:
+                        df = insol_proc_scrmeta(df)
+                path = os.path.join(directory, unit_id + ".pkl")
+                df.to_pickle(path + "." + token)
+                os.replace(path + "." + token, path)
+                fields["rows"] = len(df)
+            stop.set()
+            if queue.complete(unit_id, token, len(df)):
+                completed += 1
+                _print("Unit", unit_id, ": done,", len(df), "entries.")
+            else:
+                _print("Unit", unit_id, ": lease lost to another worker.")
+        except Exception as e:
+            stop.set()
+            queue.fail(unit_id, token, str(e), max_attempts)
+            _print("Unit", unit_id, ": failed -", e)
+        idle_since = time.monotonic()
+    return completed
+
+def queue_status(queue = ""):
+    """
+ Returns the units of a work queue filled by queue_put().
+ 
+   Args:
+       queue (str or queue object): Path of the SQLite work queue, or a queue object implementing the methods of SQLiteQueue
+  
+   Returns:
+       A Dataframe, data columns are as follows: 
+            ==========  ====================================================================================
+            id          the unit id (as `str`)
+            arguments   the arguments of insol_proc_scr() of the unit (as JSON `str`)
+            status      either {"pending", "leased", "done", "failed"} (as `str`)
+            worker      the worker which claimed the unit last (as `str`)
+            attempts    the number of claims of the unit (as `int`)
+            rows        the number of scraped announcements of a completed unit (as `int`)
+            error       the error of the last failed attempt (as `str`)
+            ==========  ====================================================================================
+    """
+    return _queue(queue).units()
+
+def queue_results(queue = "", directory = ""):
+    """
+ Collects the results of all completed units of a work queue.
+ 
+   Args:
+       queue (str or queue object): Path of the SQLite work queue, or a queue object implementing the methods of SQLiteQueue
+       directory (str): The directory the workers saved the results to
+  
+   Returns:
+       A Dataframe with the data columns of insol_proc_scrpar() - or insol_proc_scr() for workers not parsing - 
+       containing the results of all completed units
+    """
+    units = _queue(queue).units()
+    frames = [pd.read_pickle(os.path.join(directory, unit_id + ".pkl")) for unit_id in units.loc[units["status"] == "done", "id"]]
+    if len(frames) == 0:
+        return pd.DataFrame()
+    return pd.concat(frames)
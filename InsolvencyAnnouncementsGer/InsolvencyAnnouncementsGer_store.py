@@ -0,0 +1,162 @@
+import sqlite3
+import re
+import hashlib
+import pandas as pd
+from contextlib import closing
+
+_key_pattern = re.compile(r'gerichte/\s*(.*?)\s*\.htm')
+_session_pattern = re.compile(rb'PHPSESSID=[^&\'"\s#]+')
+
+# The html of each distinct page is stored once in pages, announcements reference it by content_hash. Stores written 
+# before keep the html of their announcements in announcements.scraped_html. The size of a page is the length of its 
+# html once read, decompressed if stored compressed.
+_schema = ["""CREATE TABLE IF NOT EXISTS announcements (
+                  key TEXT PRIMARY KEY,
+                  url TEXT,
+                  registry TEXT,
+                  scrape_date TEXT,
+                  scraped_html TEXT,
+                  content_hash TEXT)""",
+           """CREATE TABLE IF NOT EXISTS pages (
+                  hash TEXT PRIMARY KEY,
+                  scraped_html TEXT,
+                  size INTEGER)"""]
+
+_columns = ["key", "url", "registry", "scrape_date", "scraped_html", "content_hash"]
+
+_select = """SELECT a.key, a.url, a.registry, a.scrape_date, coalesce(a.scraped_html, p.scraped_html), a.content_hash 
+             FROM announcements a LEFT JOIN pages p ON p.hash = a.content_hash"""
+
+def announcement_key(url = ""):
+    """
+ Returns the identity of an announcement, which is encoded in the path of its URL independent of the PHP SESSION ID: 
+ state/court/year/file/date_time (example: "be/agcharlottenburg/20/0036_IN01234_20/2020_10_28__12_00_01_Er%F6ffnungen").
+ 
+   Args:
+       url (str): The URL of a proceeding announcement from alt.insolvenzbekanntmachungen.de
+  
+   Returns:
+       key (str): The announcement key, None if the URL does not link to an announcement
+    """
+    match = _key_pattern.search(str(url))
+    if match is None:
+        return None
+    return match.group(1)
+
+def content_hash(scraped_html = ""):
+    """
+ Returns the hash identifying the content of an announcement page independent of its storage format, the PHP SESSION 
+ IDs of its links and its whitespace, so that the same page fetched under different URLs has the same hash.
+ 
+   Args:
+       scraped_html (str or bytes): Scraped html content of the announcement, in any html_format of insol_proc_scr()
+  
+   Returns:
+       The SHA-256 hash of the normalized page as hex `str`, None if there is no content
+    """
+    if scraped_html is None or scraped_html != scraped_html:
+        return None
+    # Every format is converted back to the response bytes, which are hashed without decoding them
+    from .InsolvencyAnnouncementsGer import _response_html
+    return _hash(_response_html(scraped_html))
+
+def _hash(response):
+    return hashlib.sha256(b" ".join(_session_pattern.sub(b"PHPSESSID=", response).split())).hexdigest()
+
+def _connect(store):
+    con = sqlite3.connect(store)
+    for statement in _schema:
+        con.execute(statement)
+    if "content_hash" not in [row[1] for row in con.execute("PRAGMA table_info(announcements)")]:
+        con.execute("ALTER TABLE announcements ADD COLUMN content_hash TEXT")
+    if "size" not in [row[1] for row in con.execute("PRAGMA table_info(pages)")]:
+        con.execute("ALTER TABLE pages ADD COLUMN size INTEGER")
+    return con
+
+def _batches(items, size = 500):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def store_keys(store = "", keys = None):
+    """
+ Looks up which announcements are already contained in the local announcement store.
+ 
+   Args:
+       store (str): Path of the SQLite announcement store
+       keys (list of str): (optional) The announcement keys to look up, all keys of the store if None
+  
+   Returns:
+       A set of the announcement keys contained in the store
+    """
+    with closing(_connect(store)) as con:
+        if keys is None:
+            return {row[0] for row in con.execute("SELECT key FROM announcements")}
+        found = set()
+        for batch in _batches(k for k in set(keys) if k is not None):
+            query = "SELECT key FROM announcements WHERE key IN (" + ",".join("?" * len(batch)) + ")"
+            found.update(row[0] for row in con.execute(query, batch))
+        return found
+
+def store_write(df, store = ""):
+    """
+ Writes scraped announcements - the output of insol_proc_scr() - to the local announcement store. 
+ Announcements without scraped html content and announcements already contained in the store are skipped. The html 
+ is stored once per distinct page (see content_hash()), announcements with identical pages reference the same copy.
+ 
+   Args:
+       df (Dataframe): The dataframe as output of insol_proc_scr()
+       store (str): Path of the SQLite announcement store, which is created if it does not exist
+  
+   Returns:
+       The number of newly stored announcements (as `int`)
+    """
+    if "scraped_html" not in df.columns:
+        return 0
+    rows = [(announcement_key(url), url, registry, str(scrape_date), scraped_html)
+            for url, registry, scrape_date, scraped_html in zip(df["url"], df["registry"], df["scrape_date"], df["scraped_html"])
+            if scraped_html is not None]
+    rows = [row for row in rows if row[0] is not None]
+    with closing(_connect(store)) as con:
+        with con:
+            stored = set()
+            for batch in _batches(set(row[0] for row in rows)):
+                query = "SELECT key FROM announcements WHERE key IN (" + ",".join("?" * len(batch)) + ")"
+                stored.update(row[0] for row in con.execute(query, batch))
+            new = [row for row in rows if row[0] not in stored]
+            from .InsolvencyAnnouncementsGer import _response_html
+            responses = [_response_html(row[4]) for row in new]
+            hashes = [_hash(response) for response in responses]
+            sizes = [len(row[4]) if isinstance(row[4], str) else len(response) for row, response in zip(new, responses)]
+            con.executemany("INSERT OR IGNORE INTO pages VALUES (?, ?, ?)", [(h, row[4], size) for h, row, size in zip(hashes, new, sizes)])
+            before = con.total_changes
+            con.executemany("INSERT OR IGNORE INTO announcements VALUES (?, ?, ?, ?, NULL, ?)", [row[:4] + (h,) for h, row in zip(hashes, new)])
+            return con.total_changes - before
+
+def store_read(store = "", keys = None):
+    """
+ Reads announcements from the local announcement store.
+ 
+   Args:
+       store (str): Path of the SQLite announcement store
+       keys (list of str): (optional) The announcement keys to read, all announcements if None
+  
+   Returns:
+       A Dataframe, data columns are as follows: 
+            ============ ========================================================
+            key          the announcement key (as `str`)
+            url          URL of the stored proceeding announcement (as `str`)
+            registry     either {"GnR", "HRA", "HRB", "PR", "VR"} (as `str`)
+            scrape_date  date of the first scrape (as `str`)
+            scraped_html scraped html content of the announcement (as `str`)
+            content_hash the hash of the page (see content_hash()), None for announcements stored before (as `str`)
+            ============ ========================================================
+    """
+    with closing(_connect(store)) as con:
+        if keys is None:
+            return pd.DataFrame(con.execute(_select).fetchall(), columns = _columns)
+        rows = []
+        for batch in _batches(k for k in set(keys) if k is not None):
+            query = _select + " WHERE a.key IN (" + ",".join("?" * len(batch)) + ")"
+            rows.extend(con.execute(query, batch).fetchall())
+        return pd.DataFrame(rows, columns = _columns)
@@ -1,9 +1,110 @@
 import pandas as pd
-from bs4 import BeautifulSoup
-import requests
 import re
+import os
+import json
+from datetime import date, datetime
+from .InsolvencyAnnouncementsGer import _default_url, _fetch_html, _valid_search_page
+from .InsolvencyAnnouncementsGer_events import _stage
+from .InsolvencyAnnouncementsGer_constants import _states_a
 
-def insol_ann_state_summary(subject= "", date_from = "",  date_to = ""):
+_count_cache = {}
+
+def _hit_count(html_page):
+    '''Reads the number of search results from a search page without parsing the document.'''
+    match = re.search(rb'wurden\s*([\d.]+)\s*Treffer', html_page)
+    if match is not None:
+        return int(match.group(1).replace(b'.', b''))
+    if re.search(rb'keine mit Ihrer Suchanfrage', html_page) is not None:
+        return 0
+    raise ValueError("The search page contains no number of search results.")
+
+def _closed_range(date_to = ""):
+    '''Is the date range closed, so that the number of announcements cannot change anymore?'''
+    try:
+        return datetime.strptime(date_to.strip(), "%d.%m.%Y").date() < date.today()
+    except ValueError:
+        return False
+
+_states = ["Baden-Württemberg", "Bayern", "Berlin", "Brandenburg", "Bremen", "Hamburg", "Hessen", "Mecklenburg-Vorpommern", "Niedersachsen",
+       "Nordrhein-Westfalen", "Rheinland-Pfalz", "Saarland", "Sachsen", "Sachsen-Anhalt", "Schleswig-Holstein", "Thüringen"]
+_reg = ["HRA", "HRB", "GnR", "PR", "VR", "--+keine+Angabe+--"]
+
+def _translate(text = ""):
+    outp = ["Sicherungsmaßnahmen", "Eröffnungen", "Termine", "Entscheidungen im Verfahren",
+         "Entscheidungen nach Aufhebung des Verfahrens","Sonstiges", "Entscheidungen im Restschuldbefreiungsverfahren", 
+         "Verteilungsverzeichnisse", "Überwachte Insolvenzpläne", "Abweisungen mangels Masse"]
+    inp = ["Protective measures", "Openings","Events", "Decisions taken in proceedings", "Decisions taken after proceedings",
+        "Others", "Decisions taken in the residual-debt exemption proceedings", "Distribution records",
+           "Monitored insolvency plans", "Dismissals due to lack of assets"]
+    dict_urlenc = dict(zip(inp, outp,))
+    for key in dict_urlenc.keys():
+         text = text.strip().replace(key, dict_urlenc[key]) 
+    return text
+
+def _summary_frame(subject = "", date_from = "", date_to = "", counts = []):
+    '''Builds the summary from the counts of each state and register of _reg, the last one counting all announcements.'''
+    rows = []
+    for i, state in enumerate(_states):
+        rows.append([state, date_from + " - " + date_to, subject] + counts[i * len(_reg):(i + 1) * len(_reg)])
+    df = pd.DataFrame(rows, columns = ["State", "Date", "Subject", "HRA", "HRB", "GnR", "PR", "VR", "Other"])
+    cols = ["HRA", "HRB", "GnR", "PR", "VR"]
+    df["Other"] = df["Other"] - df[cols].sum(axis=1)
+    return df
+
+def _state_summary_steps(subject = "", date_from = "", date_to = "", cache_file = ""):
+    '''Runs insol_ann_state_summary() without sending any request itself, so that the blocking and the asyncio summary 
+    share it. Yields ("fetch", urls, parse, validate), answered with the list of (content, error) of _fetch_html(), 
+    and returns the summary DataFrame.'''      
+    def _urlencode(text = ""):
+        inp = ['ü', 'ö', 'ä', 'Ü', 'Ö', 'Ä', 'ß', '§', '(', ')', '/', '?', '*']
+        outp = ['%FC', '%F6', '%E4', '%DC' , '%D6', '%C4', '%DF', '%A7', '%28', '%29', '%2F', '%3F', '%2A'] 
+        dict_urlenc = dict(zip(inp, outp))
+        for key in dict_urlenc.keys():
+             text = text.strip().replace(key, dict_urlenc[key]) 
+        return text
+
+    subjects = _translate(text = subject).replace("Verteilungsverzeichnisse", "Verteilungsverzeichnisse (§ 188 InsO) d. Verw./Treuh.")
+    subjects = subjects.replace("Verteilungsverzeichnisse", "Verteilungsverzeichnisse (§ 188 InsO) d. Verw./Treuh.")
+    subjects = _urlencode(str(subjects)).replace(" ","+")
+    
+    queries = [(state, r) for state in _states for r in _reg]
+    keys = ["|".join([state, r, subjects, date_from, date_to]) for state, r in queries]
+    cache = _count_cache
+    if len(cache_file) != 0 and os.path.exists(cache_file):
+        with open(cache_file, encoding = "utf-8") as f:
+            cache = dict(json.load(f), **_count_cache)
+    missing = [(query, key) for query, key in zip(queries, keys) if key not in cache]
+    urls = [(_default_url[0] + "/bl_suche.pl?PHPSESSID=0bf78007299d3c5cd66ae29a5fbed458&Suchfunktion=uneingeschr&Absenden=Suche+starten&Bundesland=" + 
+            _urlencode(str(state)) + "&Gericht=--+Alle+Insolvenzgerichte+--&Datum1=" + date_from + "&Datum2="+ date_to +"&Name=&Sitz=&Abteilungsnr=&Registerzeichen=--&Lfdnr=&Jahreszahl=--&Registerart="+ r +
+            "&select_registergericht=&Registergericht=--+keine+Angabe+--&Registernummer=&Gegenstand=" + subjects + "&matchesperpage=10&sortedby=Datum&page=2#Ergebnis")
+            for (state, r), key in missing]
+    counts = {key: cache[key] for key in keys if key in cache}
+    results = yield ("fetch", urls, _hit_count, _valid_search_page)
+    for (query, key), (search_results, error) in zip(missing, results):
+        if search_results is None:
+            raise ValueError("The number of announcements of " + " and ".join(query) + " could not be scraped: " + error)
+        counts[key] = search_results
+    if _closed_range(date_to):
+        _count_cache.update((key, counts[key]) for query, key in missing)
+        if len(cache_file) != 0 and len(missing) != 0:
+            cache.update(_count_cache)
+            with open(cache_file + ".tmp", "w", encoding = "utf-8") as f:
+                json.dump(cache, f)
+            os.replace(cache_file + ".tmp", cache_file)
+    
+    return _summary_frame(subject, date_from, date_to, [counts[key] for key in keys])
+
+def _index_state_summary(subject = "", date_from = "", date_to = "", index = ""):
+    '''Computes the summary from the daily counts materialized in the local index by index_write().'''
+    from .InsolvencyAnnouncementsGer_index import _daily_counts
+    daily = _daily_counts(index, _translate(text = subject), date_from, date_to)
+    counts = []
+    for state_abbr in _states_a:
+        counts += [daily.get((state_abbr, r), 0) for r in _reg[:-1]]
+        counts.append(sum(count for (abbr, r), count in daily.items() if abbr == state_abbr))
+    return _summary_frame(subject, date_from, date_to, counts)
+
+def insol_ann_state_summary(subject= "", date_from = "",  date_to = "", workers = 8, max_per_host = 8, cache_file = "", index = ""):
     """
  Returns a daily summary overview of the specified announcement subject (example: "Openings") by German state of 
  specified date range.
@@ -12,6 +113,13 @@ def insol_ann_state_summary(subject= "", date_from = "",  date_to = ""):
        date_from (str): DD.MM.YYYY
        date_to (str): DD.MM.YYYY
        subject (str): subject selection either {"Protective measures", "Openings","Events", "Decisions taken in proceedings", "Decisions taken after proceedings", "Others", "Decisions taken in the residual-debt exemption proceedings", "Distribution records","Monitored insolvency plans", "Dismissals due to lack of assets"}
+       workers (int): The number of search requests sent concurrently
+       max_per_host (int): The maximum number of concurrent requests to the same host
+       cache_file (str): (optional) Path of a JSON file the counts are cached in across sessions. Counts of date ranges 
+       ending before today are always cached in memory, as they cannot change anymore.
+       index (str): (optional) Path of a local index (see index_write()) the summary is computed from instead of the 
+       portal, by summing its daily counts. The index has to contain all announcements of the date range, parsed with 
+       insol_proc_scrpar(register_type = True).
   
    Returns:
        A Dataframe, data columns are as follows: 
@@ -25,58 +133,16 @@ def insol_ann_state_summary(subject= "", date_from = "",  date_to = ""):
         PR                      the number of announcement (as `str`) 
         VR                      the number of announcement (as `str`) 
         Other                   the number of announcements not linked to reg. type (as `str`)
-    """      
-    _states = ["Baden-Württemberg", "Bayern", "Berlin", "Brandenburg", "Bremen", "Hamburg", "Hessen", "Mecklenburg-Vorpommern", "Niedersachsen",
-           "Nordrhein-Westfalen", "Rheinland-Pfalz", "Saarland", "Sachsen", "Sachsen-Anhalt", "Schleswig-Holstein", "Thüringen"]
-    _reg = ["HRA", "HRB", "GnR", "PR", "VR", "--+keine+Angabe+--"]
-        
-    def _translate(text = ""):
-        outp = ["Sicherungsmaßnahmen", "Eröffnungen", "Termine", "Entscheidungen im Verfahren",
-             "Entscheidungen nach Aufhebung des Verfahrens","Sonstiges", "Entscheidungen im Restschuldbefreiungsverfahren", 
-             "Verteilungsverzeichnisse", "Überwachte Insolvenzpläne", "Abweisungen mangels Masse"]
-        inp = ["Protective measures", "Openings","Events", "Decisions taken in proceedings", "Decisions taken after proceedings",
-            "Others", "Decisions taken in the residual-debt exemption proceedings", "Distribution records",
-               "Monitored insolvency plans", "Dismissals due to lack of assets"]
-        dict_urlenc = dict(zip(inp, outp,))
-        for key in dict_urlenc.keys():
-             text = text.strip().replace(key, dict_urlenc[key]) 
-        return text
-    
-    def _urlencode(text = ""):
-        inp = ['ü', 'ö', 'ä', 'Ü', 'Ö', 'Ä', 'ß', '§', '(', ')', '/', '?', '*']
-        outp = ['%FC', '%F6', '%E4', '%DC' , '%D6', '%C4', '%DF', '%A7', '%28', '%29', '%2F', '%3F', '%2A'] 
-        dict_urlenc = dict(zip(inp, outp))
-        for key in dict_urlenc.keys():
-             text = text.strip().replace(key, dict_urlenc[key]) 
-        return text
-
-    subjects = _translate(text = subject).replace("Verteilungsverzeichnisse", "Verteilungsverzeichnisse (§ 188 InsO) d. Verw./Treuh.")
-    subjects = subjects.replace("Verteilungsverzeichnisse", "Verteilungsverzeichnisse (§ 188 InsO) d. Verw./Treuh.")
-    subjects = _urlencode(str(subjects)).replace(" ","+")
-    
-    df = pd.DataFrame()
-    
-    for state in _states:
-        stat = state
-        temp = pd.DataFrame()
-        state = _urlencode(str(state))
-        date_range = date_from + " - " + date_to
-        output =  [stat, date_range, subject]
-        for r in _reg: 
-            url = ("https://alt.insolvenzbekanntmachungen.de/cgi-bin/bl_suche.pl?PHPSESSID=0bf78007299d3c5cd66ae29a5fbed458&Suchfunktion=uneingeschr&Absenden=Suche+starten&Bundesland=" + 
-            state + "&Gericht=--+Alle+Insolvenzgerichte+--&Datum1=" + date_from + "&Datum2="+ date_to +"&Name=&Sitz=&Abteilungsnr=&Registerzeichen=--&Lfdnr=&Jahreszahl=--&Registerart="+ r +
-            "&select_registergericht=&Registergericht=--+keine+Angabe+--&Registernummer=&Gegenstand=" + subjects + "&matchesperpage=10&sortedby=Datum&page=2#Ergebnis")
-            html_page = requests.get(url).content
-            soup = BeautifulSoup(html_page, 'html.parser')
-            text = soup.find_all('table')[1].find_all('p')[0].find_all('b')[0].get_text()
-            if text.find("Treffer") > 0:
-                search_results = int(re.findall('wurden\s*(.*?)Treffer\s*',text)[0])
-            elif text.find("keine mit Ihrer Suchanfrage übereinstimmenden Veröffentlichungen") > 0:
-                search_results = 0 
-            output.append(search_results)
-        temp = pd.DataFrame([output], columns = ["State", "Date", "Subject", "HRA", "HRB", "GnR", "PR", "VR", "Other"])
-        df = df.append(temp)
-    df = df.reset_index(drop=True)
-    cols = ["HRA", "HRB", "GnR", "PR", "VR"]
-    df["Other"] = df["Other"] - df[cols].sum(axis=1)
-    return df
+    """
+    if len(index) != 0:
+        with _stage("summary", rows = 0):
+            return _index_state_summary(subject, date_from, date_to, index)
+    steps = _state_summary_steps(subject, date_from, date_to, cache_file)
+    try:
+        step = next(steps)
+        while True:
+            with _stage("summary", rows = len(step[1])):
+                results = _fetch_html(step[1], workers, max_per_host, parse = step[2], validate = step[3])
+            step = steps.send(results)
+    except StopIteration as stop:
+        return stop.value
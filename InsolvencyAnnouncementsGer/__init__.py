@@ -1,5 +1,34 @@
-from .InsolvencyAnnouncementsGer import *
-from .InsolvencyAnnouncementsGer_summaries import insol_ann_state_summary
+from importlib import import_module
+
+_lazy = {
+    "InsolvencyAnnouncementsGer": ["set_session", "set_rate_limit", "set_lookup_cache", "set_text_cache", "refresh_lookups", "court_state_dict",
+                                   "registry_courts_dict", "regcourts_scr", "inscourts_scr", "insol_proc_scr", "insol_proc_scr_iter",
+                                   "update_url", "update_urls", "regcourts_state_scr", "insol_proc_scrpar", "insol_proc_scrmeta",
+                                   "insol_proc_scrpar_iter", "insol_proc_scrprep"],
+    "InsolvencyAnnouncementsGer_summaries": ["insol_ann_state_summary"],
+    "InsolvencyAnnouncementsGer_store": ["announcement_key", "content_hash", "store_keys", "store_read", "store_write"],
+    "InsolvencyAnnouncementsGer_jobs": ["insol_proc_scr_job"],
+    "InsolvencyAnnouncementsGer_export": ["insol_proc_to_parquet", "insol_proc_read_parquet"],
+    "InsolvencyAnnouncementsGer_events": ["set_instrumentation", "ScrapeStats"],
+    "InsolvencyAnnouncementsGer_batch": ["insol_proc_scrpar_store", "insol_proc_scrpar_store_iter"],
+    "InsolvencyAnnouncementsGer_index": ["index_write", "index_search", "index_proceeding", "index_stages"],
+    "InsolvencyAnnouncementsGer_queue": ["queue_put", "queue_work", "queue_status", "queue_results", "SQLiteQueue"],
+    "InsolvencyAnnouncementsGer_async": ["insol_proc_scr_async", "insol_proc_scr_async_iter", "insol_ann_state_summary_async"],
+}
+_modules = {name: module for module, names in _lazy.items() for name in names}
+
+__all__ = list(_modules)
+
+def __getattr__(name):
+    # The modules - and with them pandas, requests and BeautifulSoup - are imported on first access of their functions.
+    if name not in _modules:
+        raise AttributeError("module " + repr(__name__) + " has no attribute " + repr(name))
+    value = getattr(import_module("." + _modules[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
 
 __version__ = '0.2.1'
 __author__ = 'Niall Delventhal'
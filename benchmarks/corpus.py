@@ -0,0 +1,117 @@
+"""
+Corpus of announcements served by the portal stand-in (portal.py) of the benchmarks.
+
+A corpus is a list of records, each describing one announcement listed by bl_suche.pl and shown by bl_aufruf.pl. 
+Corpora are either generated synthetically or recorded from the live portal, and are saved as a fixture directory:
+
+    <directory>/corpus.json            the records
+    <directory>/pages/<n>.html         (optional) the recorded detail page of record n
+
+Usage:
+    python benchmarks/corpus.py synthetic <directory> --records 5000 --seed 1
+    python benchmarks/corpus.py record <directory> --date-from 01.10.2020 --date-to 02.10.2020
+    python benchmarks/corpus.py record <directory> --date-from 01.10.2020 --date-to 02.10.2020 --url http://127.0.0.1:8080/cgi-bin
+"""
+import os
+import sys
+import json
+import random
+import argparse
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+STATES = ["Baden-Württemberg", "Bayern", "Berlin", "Brandenburg", "Bremen", "Hamburg", "Hessen", "Mecklenburg-Vorpommern",
+          "Niedersachsen", "Nordrhein-Westfalen", "Rheinland-Pfalz", "Saarland", "Sachsen", "Sachsen-Anhalt",
+          "Schleswig-Holstein", "Thüringen"]
+ABBR = ["bw", "by", "be", "bb", "hb", "hh", "he", "mv", "ns", "nw", "rp", "sl", "sn", "st", "sh", "th"]
+REGS = ["GnR", "HRA", "HRB", "PR", "VR"]
+SUBJECTS = ["Sicherungsmaßnahmen", "Abweisungen mangels Masse", "Eröffnungen", "Termine", "Verteilungsverzeichnisse",
+            "Einstellungen mangels Masse", "Aufhebungen", "Entscheidungen im Restschuldbefreiungsverfahren", "sonstiges"]
+FORMS = ["GmbH", "GmbH & Co. KG", "AG", "UG (haftungsbeschränkt)", "e.K.", "KG", "e.V.", "eG", "OHG"]
+WORDS = ["Müller", "Schmidt", "Bäckerei", "Maschinenbau", "Logistik", "Immobilien", "Straßenbau", "Gastronomie",
+         "Handels", "Verwaltungs", "Köhler", "Weiß", "Elektro", "Holz", "Textil", "Beteiligungs"]
+CITIES = ["Köln", "München", "Berlin", "Hamburg", "Düsseldorf", "Nürnberg", "Lübeck", "Görlitz", "Saarbrücken", "Jena"]
+
+def synthetic(records = 1000, seed = 1, days = 28):
+    '''Generates `records` announcements spread over the states, registries, subjects and `days` days from 01.10.2020.'''
+    r = random.Random(seed)
+    corpus = []
+    for i in range(records):
+        s = r.randrange(len(STATES))
+        reg = r.choice(REGS + [""])
+        subject = r.choice(SUBJECTS)
+        court = "Stadt%s" % ABBR[s].upper()
+        date = (datetime(2020, 10, 1) + timedelta(days = r.randrange(days), seconds = r.randrange(86400))).strftime("%Y_%m_%d__%H_%M_%S")
+        file_number = "%04d_IN%05d_20" % (r.randint(1, 99), i)
+        path = "gerichte/%s/ag%s/20/%s/%s_%s.htm" % (ABBR[s], court.lower(), file_number, date, quote(subject, encoding = "latin-1"))
+        corpus.append({"state": STATES[s], "abbr": ABBR[s], "reg": reg, "subject": subject, "court": court, "path": path,
+                       "name": "%s %s %s" % (r.choice(WORDS), r.choice(WORDS), r.choice(FORMS)),
+                       "domicile": r.choice(CITIES), "file_number": "%d IN %d/20" % (r.randint(1, 99), i), "date": date,
+                       "registration_court": r.choice(CITIES) if reg else "", "register_number": str(r.randint(100, 99999)) if reg else "",
+                       "paragraphs": r.randint(1, 12), "page": None})
+    return corpus
+
+def save(corpus, directory, pages = None):
+    '''Saves a corpus - and optionally the recorded detail pages as bytes {record index: page} - as fixture directory.'''
+    os.makedirs(os.path.join(directory, "pages"), exist_ok = True)
+    for i, page in (pages or {}).items():
+        with open(os.path.join(directory, "pages", "%d.html" % i), "wb") as f:
+            f.write(page)
+        corpus[i]["page"] = "%d.html" % i
+    with open(os.path.join(directory, "corpus.json"), "w", encoding = "utf-8") as f:
+        json.dump(corpus, f, ensure_ascii = False)
+
+def load(directory):
+    '''Loads the corpus of a fixture directory, recorded detail pages are read as bytes into the "page" field.'''
+    with open(os.path.join(directory, "corpus.json"), encoding = "utf-8") as f:
+        corpus = json.load(f)
+    for record in corpus:
+        if record.get("page"):
+            with open(os.path.join(directory, "pages", record["page"]), "rb") as f:
+                record["page"] = f.read()
+    return corpus
+
+def record(directory, url = "", **search):
+    '''Records the announcements of a live insol_proc_scr() search - listing fields and detail pages - as fixture directory.
+    `url` is the cgi-bin base URL of another portal, for example a mirror or the stand-in, the live portal if empty.'''
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    import InsolvencyAnnouncementsGer as ia
+    if url:
+        import InsolvencyAnnouncementsGer.InsolvencyAnnouncementsGer as core
+        core._default_url[0] = url
+    df = ia.insol_proc_scr(search_type = "unlimited", html_format = "bytes", **search)
+    if df is None or len(df) == 0:
+        raise ValueError("The search returned no announcements to record.")
+    pages = list(df["scraped_html"])
+    df = ia.insol_proc_scrpar(df.copy(), convert_html_to_text = False, register_type = True)
+    corpus, recorded = [], {}
+    for row, page in zip(df.itertuples(), pages):
+        if page is None or row.state_abbr not in ABBR:
+            continue
+        recorded[len(corpus)] = page
+        corpus.append({"state": STATES[ABBR.index(row.state_abbr)], "abbr": row.state_abbr, "reg": row.register_type or "",
+                       "subject": row.subject, "court": row.insolvency_court, "path": row.url.split("datei=", 1)[1],
+                       "name": row.name_debtor, "domicile": row.domicile_debtor, "file_number": row.court_file_number,
+                       "date": row.url.split("/")[-1][:20], "registration_court": row.registration_court,
+                       "register_number": row.register_number, "paragraphs": 0, "page": None})
+    save(corpus, directory, recorded)
+    return corpus
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Generates or records a corpus for the portal stand-in.")
+    parser.add_argument("mode", choices = ["synthetic", "record"])
+    parser.add_argument("directory")
+    parser.add_argument("--records", type = int, default = 1000)
+    parser.add_argument("--seed", type = int, default = 1)
+    parser.add_argument("--days", type = int, default = 28)
+    parser.add_argument("--date-from", default = "")
+    parser.add_argument("--date-to", default = "")
+    parser.add_argument("--state", default = "")
+    parser.add_argument("--url", default = "", help = "cgi-bin base URL of the portal recorded, the live portal if empty")
+    args = parser.parse_args()
+    if args.mode == "synthetic":
+        corpus = synthetic(args.records, args.seed, args.days)
+        save(corpus, args.directory)
+    else:
+        corpus = record(args.directory, args.url, date_from = args.date_from, date_to = args.date_to, state = args.state)
+    print("Saved", len(corpus), "announcements to", args.directory)
@@ -0,0 +1,141 @@
+"""
+Offline check of the rate limiting and retry layer (set_rate_limit()) against the portal stand-in (portal.py) with 
+injected faults. Checks that
+
+    retries       a search with server errors (503) and malformed pages returns the same announcements as without faults
+    retry-after   retries of throttled requests (429) wait at least the Retry-After of the response
+    adaptive      the adaptive token bucket lowers its rate when throttled
+    breaker       the circuit breaker opens after the failure threshold and refuses further requests
+    recovery      the trial request of the open circuit breaker - with its retries - opens it again while the website 
+                  fails or returns malformed announcements and closes it once the website recovered
+
+and exits with status 1 if a check fails.
+
+Usage:
+    python benchmarks/faults.py --records 200
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import corpus as corpora
+from portal import serve
+import InsolvencyAnnouncementsGer as ia
+import InsolvencyAnnouncementsGer.InsolvencyAnnouncementsGer as core
+
+class _Events:
+    '''Collects the instrumentation events and the lowest rate of the token bucket seen on a retry.'''
+    def __init__(self):
+        self.events = []
+        self.min_rate = None
+    def __call__(self, event, fields):
+        self.events.append((event, fields))
+        if event == "retry" and core._limiter is not None:
+            self.min_rate = core._limiter.rate if self.min_rate is None else min(self.min_rate, core._limiter.rate)
+    def of(self, event):
+        return [fields for name, fields in self.events if name == event]
+
+def _scrape(corpus, **faults):
+    '''Scrapes the announcements of the corpus from a stand-in with the given faults. Returns the DataFrame with the
+    urls relative to the stand-in, so that scrapes of different stand-ins compare, and the injected faults.'''
+    server, base = serve(corpus, **faults)
+    core._default_url[0] = base
+    try:
+        df = ia.insol_proc_scr(date_from = "01.10.2020", date_to = "31.10.2020")
+    finally:
+        server.shutdown()
+    if df is not None:
+        df["url"] = df["url"].str.replace(base, "", regex = False)
+    return df, server.RequestHandlerClass.faults
+
+def check_retries(corpus):
+    ia.set_rate_limit(retries = 8, backoff = 0.01, max_backoff = 0.05, failure_threshold = 0)
+    expected, _ = _scrape(corpus)
+    df, faults = _scrape(corpus, errors = 0.15, malformed = 0.1, seed = 2)
+    same = df is not None and expected["url"].tolist() == df["url"].tolist() and expected["scraped_html"].tolist() == df["scraped_html"].tolist()
+    return same and faults["error"] > 0 and faults["malformed"] > 0, "%d errors and %d malformed pages injected" % (faults["error"], faults["malformed"])
+
+def check_retry_after(corpus):
+    ia.set_rate_limit(retries = 8, backoff = 0.001, max_backoff = 2, failure_threshold = 0)
+    events = _Events()
+    ia.set_instrumentation(events, quiet = True)
+    df, faults = _scrape(corpus[:20], throttle = 0.1, retry_after = 1, seed = 3)
+    delays = [fields["delay"] for fields in events.of("retry") if "429" in fields["error"]]
+    return df is not None and len(delays) == faults["throttle"] > 0 and min(delays) >= 1, \
+           "%d throttled requests, shortest wait %.2f s" % (len(delays), min(delays) if delays else 0)
+
+def check_adaptive(corpus):
+    ia.set_rate_limit(rate = 200, burst = 5, adaptive = True, min_rate = 1, retries = 8, backoff = 0.001, max_backoff = 0.01, failure_threshold = 0)
+    events = _Events()
+    ia.set_instrumentation(events, quiet = True)
+    df, faults = _scrape(corpus[:50], throttle = 0.1, retry_after = 0, seed = 4)
+    return df is not None and events.min_rate is not None and events.min_rate < 200, \
+           "lowest rate %s requests/s after %d throttled requests" % (events.min_rate, faults["throttle"])
+
+def check_breaker(corpus):
+    ia.set_rate_limit(retries = 0, failure_threshold = 3, reset_timeout = 60)
+    events = _Events()
+    ia.set_instrumentation(events, quiet = True)
+    server, base = serve(corpus, errors = 1.0)
+    try:
+        results = core._fetch_html([base + "/bl_suche.pl?page=%d" % i for i in range(10)], workers = 1)
+    finally:
+        server.shutdown()
+    served = server.RequestHandlerClass.requests["bl_suche.pl"]
+    return served == 3 and len(events.of("circuit_open")) == 7 and all(content is None for content, error in results), \
+           "%d requests served, %d refused" % (served, len(events.of("circuit_open")))
+
+def check_recovery(corpus):
+    ia.set_rate_limit(retries = 3, backoff = 0.01, max_backoff = 0.05, failure_threshold = 1, reset_timeout = 0.2)
+    events = _Events()
+    ia.set_instrumentation(events, quiet = True)
+    server, base = serve(corpus, errors = 1.0)
+    handler = server.RequestHandlerClass
+    fetch = lambda: core._fetch_html([base + "/bl_suche.pl?page=1"])[0][0] is not None
+    try:
+        opened = fetch() == False and fetch() == False
+        time.sleep(0.25)
+        served = handler.requests["bl_suche.pl"]
+        reopened = fetch() == False and fetch() == False
+        trial = handler.requests["bl_suche.pl"] - served
+        handler.errors = 0.0
+        time.sleep(0.25)
+        recovered = fetch() and fetch()
+    finally:
+        server.shutdown()
+    ia.set_rate_limit(retries = 0, failure_threshold = 1, reset_timeout = 0.2)
+    server, base = serve(corpus, malformed = 1.0)
+    handler = server.RequestHandlerClass
+    url = base + "/bl_aufruf.pl?PHPSESSID=" + handler.session + "&datei=" + corpus[0]["path"]
+    fetch = lambda: core._fetch_html([url], validate = core._valid_announcement)[0][0] is not None
+    try:
+        malformed = fetch() == False
+        time.sleep(0.25)
+        malformed = malformed and fetch() == False
+        handler.malformed = 0.0
+        time.sleep(0.25)
+        recovered = recovered and fetch() and fetch()
+    finally:
+        server.shutdown()
+    return opened and reopened and trial == 4 and malformed and recovered, \
+           "%d attempts of the failed trial, %s after recovery" % (trial, "closed" if recovered else "still open")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Checks retries, Retry-After, the adaptive rate and the circuit breaker.")
+    parser.add_argument("--records", type = int, default = 200)
+    parser.add_argument("--seed", type = int, default = 1)
+    args = parser.parse_args()
+    corpus = corpora.synthetic(args.records, args.seed)
+    failed = []
+    for name, check in [("retries", check_retries), ("retry-after", check_retry_after), ("adaptive", check_adaptive), ("breaker", check_breaker),
+                        ("recovery", check_recovery)]:
+        ia.set_instrumentation(quiet = True)
+        passed, detail = check(corpus)
+        print("%-12s %s  %s" % (name, "ok" if passed else "FAILED", detail))
+        if not passed:
+            failed.append(name)
+    ia.set_rate_limit()
+    sys.exit(1 if failed else 0)
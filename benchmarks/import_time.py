@@ -0,0 +1,41 @@
+"""
+Import time regression check of the package. Imports the package in fresh interpreters and exits with status 1 if 
+the import loads one of the heavy dependencies (pandas, requests, BeautifulSoup, lxml) or takes longer than --max-ms.
+
+Usage:
+    python benchmarks/import_time.py --repeat 5 --max-ms 50
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+_heavy = ["pandas", "requests", "bs4", "lxml", "numpy", "pyarrow"]
+
+_script = """
+import sys, time, json
+start = time.perf_counter()
+import InsolvencyAnnouncementsGer
+from InsolvencyAnnouncementsGer.InsolvencyAnnouncementsGer_constants import _states, _registers, _subjects, _default_url
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "modules": [m for m in %r if m in sys.modules]}))
+""" % _heavy
+
+def measure(repeat = 5):
+    '''Returns the fastest import time in milliseconds and the heavy dependencies loaded by the import.'''
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+    runs = []
+    for i in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _script], cwd = root, capture_output = True, text = True, check = True).stdout
+        runs.append(json.loads(output))
+    return min(run["seconds"] for run in runs) * 1000, sorted(set(m for run in runs for m in run["modules"]))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Checks the import time of the package.")
+    parser.add_argument("--repeat", type = int, default = 5)
+    parser.add_argument("--max-ms", type = float, default = 50)
+    args = parser.parse_args()
+    milliseconds, modules = measure(args.repeat)
+    print("import InsolvencyAnnouncementsGer: %.1f ms, heavy modules loaded: %s" % (milliseconds, ", ".join(modules) or "none"))
+    sys.exit(1 if modules or milliseconds > args.max_ms else 0)
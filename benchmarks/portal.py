@@ -0,0 +1,180 @@
+"""
+Local stand-in of the portal alt.insolvenzbekanntmachungen.de for the benchmarks. It serves the search (bl_suche.pl) 
+and the announcements (bl_aufruf.pl) of a corpus (corpus.py) with a configurable latency per request and counts the 
+served requests per script. Faults of the website may be injected at configurable rates: server errors (503), 
+throttling (429 with Retry-After) and malformed pages (a maintenance page without results or keywords).
+
+Usage:
+    python benchmarks/portal.py --records 5000 --latency 0.05 --port 8080
+    python benchmarks/portal.py --fixtures <directory> --port 8080
+    python benchmarks/portal.py --errors 0.1 --throttle 0.05 --retry-after 1 --malformed 0.05
+"""
+import sys
+import html
+import time
+import random
+import argparse
+import threading
+from datetime import datetime
+from collections import Counter
+from urllib.parse import urlparse, parse_qs, quote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import corpus as corpora
+
+_paragraph = ("Das Amtsgericht hat am %s angeordnet, dass Verfügungen der Schuldnerin über Gegenstände ihres Vermögens nur "
+              "noch mit Zustimmung des vorläufigen Insolvenzverwalters wirksam sind (&sect; 21 Abs. 2 Nr. 2 InsO). "
+              "Zum vorläufigen Insolvenzverwalter wurde Rechtsanwalt Dr. Max Mustermann, Hauptstraße 1, %s bestellt.")
+
+class PortalHandler(BaseHTTPRequestHandler):
+    corpus = []
+    latency = 0.0
+    session = "0123456789abcdef0123456789abcdef"
+    requests = Counter()
+    lock = threading.Lock()
+    errors = 0.0
+    throttle = 0.0
+    retry_after = 1
+    malformed = 0.0
+    faults = Counter()
+    rng = random.Random(1)
+
+    def log_message(self, *args):
+        pass
+
+    def send(self, body, status = 200, headers = None):
+        if isinstance(body, str):
+            body = body.encode("latin-1", "xmlcharrefreplace")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "text/html; charset=iso-8859-1")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        url = urlparse(self.path)
+        query = parse_qs(url.query, encoding = "latin-1")
+        script = url.path.rsplit("/", 1)[-1]
+        with self.lock:
+            self.requests[script] += 1
+            draw = self.rng.random()
+        fault = self.fault(draw) if script in ("bl_suche.pl", "bl_aufruf.pl") else None
+        if fault is not None:
+            with self.lock:
+                self.faults[fault] += 1
+            if fault == "error":
+                return self.send("<html><body>Service Unavailable</body></html>", 503)
+            if fault == "throttle":
+                return self.send("<html><body>Too Many Requests</body></html>", 429, {"Retry-After": str(self.retry_after)})
+            return self.send("<html><body><p>Wegen Wartungsarbeiten ist das Portal vor&uuml;bergehend nicht erreichbar.</p></body></html>")
+        if script == "bl_suche.pl":
+            return self.send(self.search(query))
+        if script == "bl_aufruf.pl":
+            return self.send(self.announcement(query.get("datei", [""])[0]))
+        self.send("<html><body>Not Found</body></html>", 404)
+
+    def fault(self, draw):
+        '''Returns the fault injected into a request with the random number `draw`, None for a regular response.'''
+        for fault, rate in [("error", self.errors), ("throttle", self.throttle), ("malformed", self.malformed)]:
+            if draw < rate:
+                return fault
+            draw -= rate
+        return None
+
+    def search(self, query):
+        get = lambda key, default = "": query.get(key, [default])[0]
+        records = self.corpus
+        if get("Bundesland") in corpora.STATES:
+            records = [r for r in records if r["state"] == get("Bundesland")]
+        if get("Registerart") in corpora.REGS:
+            records = [r for r in records if r["reg"] == get("Registerart")]
+        if get("Gegenstand") and not get("Gegenstand").startswith("--"):
+            records = [r for r in records if get("Gegenstand").startswith(r["subject"])]
+        for key, after in [("Datum1", True), ("Datum2", False)]:
+            if get(key):
+                day = datetime.strptime(get(key), "%d.%m.%Y").strftime("%Y_%m_%d")
+                records = [r for r in records if (r["date"][:10] >= day) == after or r["date"][:10] == day]
+        per_page = int(get("matchesperpage", "100"))
+        page = int(get("page", "1"))
+        if get("Suchfunktion") == "detail" and get("Gericht", "--").startswith("--"):
+            message = "Bitte wählen Sie bei der Detailsuche ein Insolvenzgericht aus."
+        elif records:
+            message = "Es wurden %d Treffer gefunden." % len(records)
+        else:
+            message = "Es wurden keine mit Ihrer Suchanfrage übereinstimmenden Veröffentlichungen gefunden."
+        links = "".join('<li><a href="javascript:NeuFenster(\'/cgi-bin/bl_aufruf.pl?PHPSESSID=%s&amp;datei=%s\')">%s<br>%s<br>%s, %s</a></li>\n'
+                        % (self.session, r["path"], ".".join(reversed(r["date"][:10].split("_"))), r["file_number"],
+                           html.escape(r["name"]), html.escape(r["domicile"]))
+                        for r in records[(page - 1) * per_page: page * per_page])
+        script = "".join('RegisterArray["%s"] = new Array("-- keine Angabe --","Aachen","Berlin (Charlottenburg)","Köln");\n' % reg
+                         for reg in corpora.REGS)
+        script += "".join('BundeslandArray["%s"] = new Array("Stadt%s","Zweitstadt%s");\n' % (state, abbr.upper(), abbr.upper())
+                          for state, abbr in zip(corpora.STATES, corpora.ABBR))
+        return ("<html><head><title>Insolvenzbekanntmachungen</title><script>%s</script></head><body>"
+                "<table><tr><td>Suche</td></tr></table><table><tr><td><p><b>%s</b></p><ul>%s</ul></td></tr></table></body></html>"
+                % (script, message, links))
+
+    def announcement(self, path):
+        record = self.paths().get(quote(path, safe = "/%", encoding = "latin-1")) or self.paths().get(path)
+        if record is None:
+            return "<html><body>Die Bekanntmachung wurde nicht gefunden.</body></html>"
+        if record.get("page"):
+            return record["page"]
+        keywords = "~".join(html.escape(field) for field in ["AG " + record["court"], record["file_number"], record["name"],
+                            record["domicile"], record["subject"], record["registration_court"], record["reg"],
+                            record["register_number"], "true" if record["reg"] else "false"])
+        date = ".".join(reversed(record["date"][:10].split("_")))
+        text = "\n".join("<p>%s</p>" % (_paragraph % (date, html.escape(record["domicile"]))) for i in range(record["paragraphs"]))
+        return ('<html><head><title>Insolvenzbekanntmachungen</title>\n<META NAME="keywords" CONTENT="%s">\n</head>\n'
+                '<body><p><b>Amtsgericht %s</b></p><p>Bekanntmachung</p>\n<p>%s</p>\n<p>In dem Verfahren über das Vermögen der %s, %s:</p>\n'
+                '%s<!-- Ende --><script>var geladen = 1;</script>\n</body></html>'
+                % (keywords, html.escape(record["court"]), record["file_number"], html.escape(record["name"]),
+                   html.escape(record["domicile"]), text))
+
+    @classmethod
+    def paths(cls):
+        if getattr(cls, "_paths", None) is None or cls._paths[0] is not cls.corpus:
+            cls._paths = (cls.corpus, {record["path"]: record for record in cls.corpus})
+        return cls._paths[1]
+
+class PortalServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # A listen backlog of 5 drops connections of concurrent workers, which then wait a second for the SYN retransmit.
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Clients cancelling their requests close the connection early.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+def serve(corpus, latency = 0.0, port = 0, errors = 0.0, throttle = 0.0, retry_after = 1, malformed = 0.0, seed = 1):
+    '''Starts the stand-in serving `corpus` in a background thread and returns the server and its cgi-bin base URL. 
+    `errors`, `throttle` and `malformed` are the shares of requests answered with 503, 429 and a maintenance page.'''
+    handler = type("Handler", (PortalHandler,), {"corpus": corpus, "latency": latency, "requests": Counter(), "lock": threading.Lock(),
+                                                 "errors": errors, "throttle": throttle, "retry_after": retry_after,
+                                                 "malformed": malformed, "faults": Counter(), "rng": random.Random(seed)})
+    server = PortalServer(("127.0.0.1", port), handler)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    return server, "http://127.0.0.1:%d/cgi-bin" % server.server_address[1]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Serves a local stand-in of alt.insolvenzbekanntmachungen.de.")
+    parser.add_argument("--fixtures", default = "", help = "fixture directory of corpus.py, a synthetic corpus if empty")
+    parser.add_argument("--records", type = int, default = 1000)
+    parser.add_argument("--seed", type = int, default = 1)
+    parser.add_argument("--latency", type = float, default = 0.0)
+    parser.add_argument("--port", type = int, default = 8080)
+    parser.add_argument("--errors", type = float, default = 0.0, help = "share of requests answered with 503")
+    parser.add_argument("--throttle", type = float, default = 0.0, help = "share of requests answered with 429")
+    parser.add_argument("--retry-after", type = int, default = 1, help = "Retry-After header of the 429 responses in seconds")
+    parser.add_argument("--malformed", type = float, default = 0.0, help = "share of requests answered with a maintenance page")
+    args = parser.parse_args()
+    corpus = corpora.load(args.fixtures) if args.fixtures else corpora.synthetic(args.records, args.seed)
+    server, base = serve(corpus, args.latency, args.port, args.errors, args.throttle, args.retry_after, args.malformed, args.seed)
+    print("Serving", len(corpus), "announcements at", base + "/bl_suche.pl")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
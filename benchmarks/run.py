@@ -0,0 +1,109 @@
+"""
+Offline benchmarks of the scraping and parsing functions against the local portal stand-in (portal.py). 
+
+Reports for insol_proc_scr, insol_proc_scrpar and insol_ann_state_summary the duration, the listing pages/s, the 
+detail pages/s, the parsed rows/s and the peak memory allocated by Python. The peak memory is traced in a repeated 
+run, since tracemalloc slows down the timed run considerably. The results may be saved as JSON and compared against a saved baseline, the script exits with status 1 if a throughput falls or the peak memory 
+grows by more than the tolerance - so that regressions show up in CI.
+
+Usage:
+    python benchmarks/run.py --records 5000 --latency 0.01 --workers 8 --json results.json
+    python benchmarks/run.py --fixtures <directory> --baseline baseline.json --tolerance 0.25
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import corpus as corpora
+from portal import serve
+import InsolvencyAnnouncementsGer as ia
+import InsolvencyAnnouncementsGer.InsolvencyAnnouncementsGer as core
+import InsolvencyAnnouncementsGer.InsolvencyAnnouncementsGer_summaries as summaries
+
+def _call(function, args, kwargs):
+    summaries._count_cache.clear()
+    return function(*[arg.copy() if hasattr(arg, "copy") else arg for arg in args], **kwargs)
+
+def measure(name, server, memory, function, *args, **kwargs):
+    '''Runs `function` and returns its result together with its duration, throughput and peak memory.'''
+    requests = server.RequestHandlerClass.requests
+    requests.clear()
+    start = time.perf_counter()
+    result = _call(function, args, kwargs)
+    seconds = time.perf_counter() - start
+    metrics = {"seconds": round(seconds, 3)}
+    for script, metric in [("bl_suche.pl", "listing_pages_per_s"), ("bl_aufruf.pl", "detail_pages_per_s")]:
+        if requests[script]:
+            metrics[metric] = round(requests[script] / seconds, 1)
+    if hasattr(result, "__len__") and "scrpar" in name:
+        metrics["rows_per_s"] = round(len(result) / seconds, 1)
+    if memory:
+        tracemalloc.start()
+        _call(function, args, kwargs)
+        metrics["peak_memory_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+        tracemalloc.stop()
+    print("%-32s" % name, "  ".join("%s %s" % (metric, value) for metric, value in metrics.items()))
+    return result, metrics
+
+def run(corpus, latency = 0.0, workers = 8, memory = True):
+    '''Benchmarks the scraping, parsing and summary functions against a stand-in serving `corpus`.'''
+    server, base = serve(corpus, latency)
+    core._default_url[0] = base
+    ia.set_instrumentation(quiet = True)
+    results = {}
+    try:
+        _, results["insol_proc_scr (listing)"] = measure("insol_proc_scr (listing)", server, memory, ia.insol_proc_scr,
+            reg = corpora.REGS, search_type = "unlimited", scrape_html = False, workers = workers)
+        df, results["insol_proc_scr (detail)"] = measure("insol_proc_scr (detail)", server, memory, ia.insol_proc_scr,
+            reg = corpora.REGS, search_type = "unlimited", workers = workers)
+        for parser in ["lxml", "fast"]:
+            name = "insol_proc_scrpar (%s)" % parser
+            _, results[name] = measure(name, server, memory, ia.insol_proc_scrpar, df.reset_index(drop = True), text_parser = parser)
+        _, results["insol_ann_state_summary"] = measure("insol_ann_state_summary", server, memory, ia.insol_ann_state_summary,
+            workers = workers)
+    finally:
+        server.shutdown()
+    return results
+
+def regressions(results, baseline, tolerance = 0.25):
+    '''Returns the metrics of `results` which are worse than `baseline` by more than `tolerance`.'''
+    found = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            reference = baseline.get(name, {}).get(metric)
+            if not reference or metric == "seconds":
+                continue
+            if metric == "peak_memory_mb" and value > reference * (1 + tolerance):
+                found.append("%s %s: %s (baseline %s)" % (name, metric, value, reference))
+            elif metric.endswith("_per_s") and value < reference * (1 - tolerance):
+                found.append("%s %s: %s (baseline %s)" % (name, metric, value, reference))
+    return found
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmarks the scraper against a local portal stand-in.")
+    parser.add_argument("--fixtures", default = "", help = "fixture directory of corpus.py, a synthetic corpus if empty")
+    parser.add_argument("--records", type = int, default = 2000)
+    parser.add_argument("--seed", type = int, default = 1)
+    parser.add_argument("--latency", type = float, default = 0.0, help = "seconds per request of the stand-in")
+    parser.add_argument("--workers", type = int, default = 8)
+    parser.add_argument("--no-memory", action = "store_true", help = "skips the traced runs measuring the peak memory")
+    parser.add_argument("--json", default = "", help = "saves the results to this file")
+    parser.add_argument("--baseline", default = "", help = "compares the results to this saved result file")
+    parser.add_argument("--tolerance", type = float, default = 0.25)
+    args = parser.parse_args()
+    corpus = corpora.load(args.fixtures) if args.fixtures else corpora.synthetic(args.records, args.seed)
+    results = run(corpus, args.latency, args.workers, not args.no_memory)
+    if args.json:
+        with open(args.json, "w", encoding = "utf-8") as f:
+            json.dump(results, f, indent = 1)
+    if args.baseline:
+        with open(args.baseline, encoding = "utf-8") as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for regression in found:
+            print("Regression:", regression)
+        sys.exit(1 if found else 0)
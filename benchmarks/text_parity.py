@@ -0,0 +1,72 @@
+"""
+Parity check of the two text parsers of insol_proc_scrpar(): the "fast" parser (_get_text) has to return exactly the 
+text of the BeautifulSoup parser (_get_text_lxml). Compares both on the announcement pages served by the portal 
+stand-in (portal.py) - by default the saved pages of benchmarks/fixtures, recorded with corpus.py, or a synthetic 
+corpus - in the "text" and "repr" html formats and on html edge cases, and exits with status 1 on any difference.
+
+Usage:
+    python benchmarks/text_parity.py
+    python benchmarks/text_parity.py --fixtures <directory>
+    python benchmarks/text_parity.py --fixtures "" --records 500
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import corpus as corpora
+from portal import serve
+import InsolvencyAnnouncementsGer as ia
+import InsolvencyAnnouncementsGer.InsolvencyAnnouncementsGer as core
+
+EDGE_CASES = {
+    "entities": "<html><body><p>M&uuml;ller &amp; S&ouml;hne &sect; 21 &nbsp;&#8364;&#x20AC; &lt;b&gt; &unknown; &amp</p></body></html>",
+    "cdata": "<html><body><p>vor<![CDATA[ im CDATA <b>fett</b> ]]>nach</p></body></html>",
+    "script": "<html><head><script>var a = '<p>kein Text</p>';</script></head><body>Text<script type=\"text/javascript\">if (a < b) {}</script>Ende</body></html>",
+    "style": "<html><head><style>p { color: red; }</style></head><body><p>Text</p><style>/* < > */</style></body></html>",
+    "template": "<html><body><template><p>Vorlage</p></template><p>Text</p></body></html>",
+    "pre": "<html><body><pre>  eingerückt\n\n    Zeilen  </pre><p>  Text  </p></body></html>",
+    "textarea": "<html><body><textarea>  <b>kein Tag</b>\n Zeile </textarea>Ende</body></html>",
+    "comments": "<html><body><!-- Kommentar -->Text<!-- <p>auskommentiert</p> -->Ende<!--unterminated</body></html>",
+    "doctype": "<!DOCTYPE html PUBLIC \"-//W3C//DTD HTML 4.01//EN\"><?xml version=\"1.0\"?><html><body>Text</body></html>",
+    "malformed": "<html><body><p>offen<b>fett<i>kursiv</p>Rest</td></table><br>Zeile<br/>Zeile</body>",
+    "tables": "<html><body><table><tr><td>A</td><td>B</td></tr><tr><td><table><tr><td>C</td></tr></table></td></tr></table></body></html>",
+    "whitespace": "<html><body>\n\t <p>\u00a0Text\r\nmit\tTabs</p>\n</body></html>",
+    "fragment": "Bekanntmachung ohne <b>html</b> Element",
+    "empty": "",
+}
+
+def pages(corpus, html_format = "text"):
+    '''Returns the announcement pages of the corpus as scraped by insol_proc_scr() from the stand-in.'''
+    server, base = serve(corpus)
+    core._default_url[0] = base
+    try:
+        df = ia.insol_proc_scr(date_from = "01.01.2000", date_to = "31.12.2099", html_format = html_format)
+    finally:
+        server.shutdown()
+    return dict(zip(df["url"], df["scraped_html"]))
+
+def differences(cases):
+    '''Returns the names of the cases whose texts of the two parsers differ.'''
+    return [name for name, page in cases.items() if core._get_text(page) != core._get_text_lxml(page)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Checks that the fast and the lxml text parser return the same text.")
+    parser.add_argument("--fixtures", default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures"),
+                        help = "fixture directory of corpus.py (default: benchmarks/fixtures), a synthetic corpus if empty")
+    parser.add_argument("--records", type = int, default = 500)
+    parser.add_argument("--seed", type = int, default = 1)
+    args = parser.parse_args()
+    ia.set_instrumentation(quiet = True)
+    corpus = corpora.load(args.fixtures) if args.fixtures else corpora.synthetic(args.records, args.seed)
+    cases = dict(EDGE_CASES)
+    for html_format in ["text", "repr"]:
+        cases.update((html_format + " " + url, page) for url, page in pages(corpus, html_format).items())
+    found = differences(cases)
+    for name in found:
+        print("Difference:", name)
+        print("  fast:", repr(core._get_text(cases[name]))[:300])
+        print("  lxml:", repr(core._get_text_lxml(cases[name]))[:300])
+    print("Compared", len(cases), "pages:", len(found), "differences.")
+    sys.exit(1 if found else 0)